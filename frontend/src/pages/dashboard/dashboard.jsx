@@ -55,7 +55,7 @@ class Dashboard extends Component {
 
     // Pagination
     limit: 50,
-    skip: 0,
+    nextCursor: null,
     hasMore: true,
 
     // Chart type
@@ -124,10 +124,10 @@ class Dashboard extends Component {
   };
 
   fetchCandidates = async (reset = true) => {
-    const { statusFilter, limit, skip } = this.state;
+    const { statusFilter, limit, nextCursor } = this.state;
 
     if (reset) {
-      this.setState({ candidatesLoading: true, skip: 0, candidates: [] });
+      this.setState({ candidatesLoading: true, nextCursor: null, candidates: [] });
     } else {
       this.setState({ candidatesLoading: true });
     }
@@ -142,7 +142,9 @@ class Dashboard extends Component {
       }
 
       params.push(`limit=${limit}`);
-      params.push(`skip=${reset ? 0 : skip}`);
+      if (!reset && nextCursor) {
+        params.push(`cursor=${encodeURIComponent(nextCursor)}`);
+      }
 
       url += params.join('&');
 
@@ -155,6 +157,7 @@ class Dashboard extends Component {
         return;
       }
 
+      const cursor = response.headers.get('X-Next-Cursor');
       const data = await response.json();
       console.log('Candidates data:', data);
 
@@ -173,8 +176,8 @@ class Dashboard extends Component {
       this.setState(prevState => ({
         candidates: reset ? candidatesData : [...prevState.candidates, ...candidatesData],
         candidatesLoading: false,
-        hasMore: candidatesData.length === limit,
-        skip: reset ? limit : prevState.skip + limit
+        hasMore: Boolean(cursor),
+        nextCursor: cursor
       }));
     } catch (error) {
       console.error('Error fetching candidates:', error);
@@ -1,15 +1,21 @@
-import os
-from datetime import datetime, timezone
+from datetime import date
 from typing import Optional, List
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 import app.db as db_module
+from app.db import run_db
 from app.auth import get_current_admin
-from app.config import REQUESTS_COLLECTION, CV_FILES_DIR
+from app.config import REQUESTS_COLLECTION, DAILY_STATS_COLLECTION, CV_EVIDENCE_COLLECTION
+from app.downloads import cv_file_response
+from app.evidence import get_evidence
+from app.cv import _set_status
+from app.daily_stats import read_daily_stats
+from app.pagination import list_page
 from app.schemas import Stats, StatusUpdate
+from app.stats import get_request_stats, invalidate_stats
+from app.timings import node_timing_stats
 
 router = APIRouter(prefix="/api/v1", tags=["Admin Dashboard"])
 
@@ -26,126 +32,101 @@ def _serialize_doc(doc: dict) -> dict:
 
 # --- Dashboard Stats ---
 @router.get("/dashboard/stats", response_model=Stats)
-def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
+async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
     """Provides counts for the dashboard top-row cards."""
-    requests_col = db_module.db[REQUESTS_COLLECTION]
-    
-    return Stats(
-        total_requests=requests_col.count_documents({}),
-        approved=requests_col.count_documents({"status": "approved"}),
-        rejected=requests_col.count_documents({"status": "rejected"}),
-        pending=requests_col.count_documents({"status": {"$in": ["pending", None]}})
-    )
+    return Stats(**await run_db(get_request_stats, db_module.db[REQUESTS_COLLECTION]))
 
 # --- Dashboard Graph Data ---
 @router.get("/dashboard/graph")
-def get_graph_data(current_admin: dict = Depends(get_current_admin)):
+async def get_graph_data(
+    start: Optional[date] = Query(None, description="First day to include (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Last day to include (YYYY-MM-DD)"),
+    current_admin: dict = Depends(get_current_admin),
+):
     """Returns time-series data for the dashboard chart (submissions per day)."""
-    requests_col = db_module.db[REQUESTS_COLLECTION]
-    
-    pipeline = [
-        {"$match": {"created_at": {"$exists": True}}},
-        {
-            "$group": {
-                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
-                "total": {"$sum": 1},
-            }
-        },
-        {"$sort": {"_id": 1}},
-    ]
-    
-    data = list(requests_col.aggregate(pipeline))
-    return [{"date": d.get("_id"), "total": d.get("total", 0)} for d in data]
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return await run_db(read_daily_stats, db_module.db[DAILY_STATS_COLLECTION], start, end)
+
+# --- Verification Latency ---
+@router.get("/dashboard/timings")
+async def get_graph_timings(
+    limit: int = Query(500, ge=1, le=5000, description="How many recent verifications to summarise"),
+    current_admin: dict = Depends(get_current_admin),
+):
+    """Per-node latency percentiles, external calls and errors of recent graph runs."""
+    return await run_db(node_timing_stats, db_module.db[REQUESTS_COLLECTION], limit)
 
 # --- Candidate Listing (Approved/Rejected/Pending Pages) ---
 @router.get("/candidates")
-def list_candidates(
+async def list_candidates(
     status: Optional[str] = Query(None, description="Filter by: approved, rejected, or pending"),
     limit: int = Query(50, ge=1, le=200),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: use `cursor`"),
     current_admin: dict = Depends(get_current_admin),
 ):
     """Returns a list of candidates. Used for the main table and filtered status pages."""
     requests_col = db_module.db[REQUESTS_COLLECTION]
-    query = {}
     
-    if status:
-        if status not in {"approved", "rejected", "pending"}:
-            raise HTTPException(status_code=400, detail="Invalid status filter")
-        query["status"] = status
-        
-    cursor = requests_col.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    items = [_serialize_doc(doc) for doc in cursor]
-    return {"items": items, "count": len(items)}
+    if status and status not in {"approved", "rejected", "pending"}:
+        raise HTTPException(status_code=400, detail="Invalid status filter")
+
+    try:
+        docs, next_cursor = await run_db(list_page, requests_col, status, limit, cursor, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [_serialize_doc(doc) for doc in docs]
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
 
 # --- Candidate Detail Pop-up ---
 @router.get("/candidates/{candidate_id}")
-def get_candidate_details(candidate_id: str, current_admin: dict = Depends(get_current_admin)):
-    """Fetch full details for a specific candidate pop-up."""
+async def get_candidate_details(
+    candidate_id: str,
+    evidence: bool = Query(False, description="Also load the raw evidence behind graph_results"),
+    current_admin: dict = Depends(get_current_admin),
+):
+    """Fetch full details for a specific candidate pop-up.
+
+    Commits, search results and verdict details are stored apart from the
+    request and only loaded with `?evidence=true`.
+    """
     requests_col = db_module.db[REQUESTS_COLLECTION]
     try:
         obj_id = ObjectId(candidate_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid candidate ID format")
         
-    doc = requests_col.find_one({"_id": obj_id})
+    doc = await run_db(requests_col.find_one, {"_id": obj_id})
     if not doc:
         raise HTTPException(status_code=404, detail="Candidate not found")
+    evidence_id = (doc.get("graph_results") or {}).get("evidence")
+    if evidence and evidence_id:
+        doc["evidence"] = await run_db(get_evidence, db_module.db[CV_EVIDENCE_COLLECTION], evidence_id)
     return _serialize_doc(doc)
 
 # --- Status Management (Approve/Reject Buttons) ---
 @router.patch("/candidates/{candidate_id}/status")
-def update_status(
+async def update_status(
     candidate_id: str,
     data: StatusUpdate,
     current_admin: dict = Depends(get_current_admin),
 ):
     """Updates a candidate's status and records the timestamp."""
-    requests_col = db_module.db[REQUESTS_COLLECTION]
     try:
         obj_id = ObjectId(candidate_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid candidate ID format")
 
-    update_fields = {
-        "status": data.status,
-        "status_updated_at": datetime.now(timezone.utc)
-    }
-
-    res = requests_col.update_one({"_id": obj_id}, {"$set": update_fields})
-    if res.matched_count == 0:
+    # Shared with app/cv.py so the two status endpoints cannot drift apart
+    if not await run_db(_set_status, obj_id, data.status):
         raise HTTPException(status_code=404, detail="Candidate not found")
+    invalidate_stats()
 
     return {"message": f"Candidate status successfully updated to {data.status}"}
 
 # --- Secure CV Download ---
 @router.get("/candidates/{candidate_id}/download")
-def download_cv(candidate_id: str, current_admin: dict = Depends(get_current_admin)):
-    """Verifies admin access and streams the PDF file from disk."""
-    requests_col = db_module.db[REQUESTS_COLLECTION]
-    try:
-        obj_id = ObjectId(candidate_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid ID format")
-
-    doc = requests_col.find_one({"_id": obj_id})
-    if not doc or "cv_path" not in doc:
-        raise HTTPException(status_code=404, detail="CV file not found")
-
-    # Construct path: handles both absolute and relative paths stored in DB
-    file_path = doc["cv_path"]
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(CV_FILES_DIR, file_path)
-
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Physical file missing from server storage")
-
-    # Generate a clean filename for the hiring team
-    last_name = doc.get("candidate", {}).get("last_name", "Candidate")
-    friendly_name = f"CV_{last_name}.pdf"
-
-    return FileResponse(
-        path=file_path, 
-        filename=friendly_name, 
-        media_type="application/pdf"
-    )
\ No newline at end of file
+async def download_cv(candidate_id: str, request: Request, current_admin: dict = Depends(get_current_admin)):
+    """Verifies admin access and streams the CV file from disk (supports Range and ETag revalidation)."""
+    return await cv_file_response(request, candidate_id)
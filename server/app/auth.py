@@ -1,3 +1,6 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -13,6 +16,9 @@ from app.config import (
     JWT_ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     ADMIN_COLLECTION,
+    ADMIN_CACHE_TTL_SECONDS,
+    ADMIN_CACHE_MAX_ENTRIES,
+    ADMIN_TRUST_CLAIMS_SECONDS,
 )
 from app.schemas import AdminLogin, Token
 
@@ -22,6 +28,45 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 # Bearer auth scheme
 security_scheme = HTTPBearer(auto_error=True)
 
+# Admin documents by token subject: {sub: (expires_at, admin)}. Every protected
+# request needs the admin, so repeat lookups are served from memory.
+#
+# Admins are only created by app/seed.py and changed or removed directly in
+# MongoDB, outside the API processes, so there is nothing here that could
+# invalidate an entry. A deleted or changed admin is noticed within
+# ADMIN_CACHE_TTL_SECONDS (plus ADMIN_TRUST_CLAIMS_SECONDS for fresh tokens,
+# when enabled); that TTL is the revocation bound.
+_admin_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_admin_cache_lock = threading.Lock()
+_admin_cache_counters = {"hits": 0, "misses": 0, "trusted_claims": 0}
+
+
+def admin_cache_stats() -> dict:
+    with _admin_cache_lock:
+        return {**_admin_cache_counters, "size": len(_admin_cache)}
+
+
+def _lookup_admin(admin_id: str) -> Optional[dict]:
+    now = time.monotonic()
+    with _admin_cache_lock:
+        entry = _admin_cache.get(admin_id)
+        if entry is not None and entry[0] > now:
+            _admin_cache.move_to_end(admin_id)
+            _admin_cache_counters["hits"] += 1
+            return dict(entry[1])
+        _admin_cache_counters["misses"] += 1
+
+    # The password hash is never needed past login, so it is not cached
+    admin = db[ADMIN_COLLECTION].find_one({"_id": ObjectId(admin_id)}, {"password_hash": 0})
+    if admin:
+        with _admin_cache_lock:
+            _admin_cache[admin_id] = (now + ADMIN_CACHE_TTL_SECONDS, admin)
+            _admin_cache.move_to_end(admin_id)
+            while len(_admin_cache) > ADMIN_CACHE_MAX_ENTRIES:
+                _admin_cache.popitem(last=False)
+        admin = dict(admin)
+    return admin
+
 
 def create_access_token(subject: str, extra_claims: Optional[dict] = None) -> str:
     now = datetime.now(timezone.utc)
@@ -44,7 +89,7 @@ def login(payload: AdminLogin):
     if not user or not verify_password(payload.password, user.get("password_hash", "")):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token(subject=str(user.get("_id")))
+    token = create_access_token(subject=str(user.get("_id")), extra_claims={"username": user.get("username")})
     return Token(access_token=token, token_type="bearer", expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
@@ -58,8 +103,14 @@ def get_current_admin(
         if payload.get("role") != "admin":
             raise HTTPException(status_code=403, detail="Forbidden")
         admin_id = payload.get("sub")
-        admins = db[ADMIN_COLLECTION]
-        admin = admins.find_one({"_id": ObjectId(admin_id)})
+        issued_ago = time.time() - payload.get("iat", 0)
+        if ADMIN_TRUST_CLAIMS_SECONDS > 0 and 0 <= issued_ago <= ADMIN_TRUST_CLAIMS_SECONDS:
+            # Freshly signed token: build the admin from its claims
+            with _admin_cache_lock:
+                _admin_cache_counters["trusted_claims"] += 1
+            admin = {"_id": ObjectId(admin_id), "username": payload.get("username")}
+        else:
+            admin = _lookup_admin(admin_id)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
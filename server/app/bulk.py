@@ -0,0 +1,457 @@
+"""Bulk CV import and re-verification.
+
+Usage:
+  python -m app.bulk import path/to/cvs/         # every .pdf/.doc/.docx in a directory
+  python -m app.bulk import applicants.jsonl     # or applicants.csv
+  python -m app.bulk reverify                    # re-run the graph for every request
+  python -m app.bulk reverify --status pending
+
+Environment fallbacks:
+  BULK_WORKERS, BULK_BATCH_SIZE
+
+A manifest has one applicant per row: `path` (relative to the manifest) plus
+any of first_name, middle_name, last_name, email, phone_number, national_id,
+fan_number and created_at (ISO 8601).
+
+CVs run through `run_cv_graph` in a pool of spawned processes, and results are
+written with batched, unordered `bulk_write` upserts. Imports are matched on
+file content and email, so importing the same applicants twice does not
+duplicate them. Each finished key is appended to a progress file that a rerun
+skips, so an interrupted run resumes where it stopped; the file is removed
+once a run completes without failures.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from pymongo import InsertOne, UpdateOne
+
+from app.config import (
+    REQUESTS_COLLECTION,
+    DAILY_STATS_COLLECTION,
+    CV_RESULTS_COLLECTION,
+    CV_EVIDENCE_COLLECTION,
+    CV_STORE_EVIDENCE,
+    CV_FILES_DIR,
+    BULK_WORKERS,
+    BULK_BATCH_SIZE,
+)
+from app.daily_stats import record_submissions
+from app.evidence import new_evidence_id
+from app.jobs import DONE, RUNNING, cached_job, cv_abs_path, new_job
+from app.result_cache import get_cached_result
+from app.uploads import MAGIC
+
+CANDIDATE_FIELDS = ("first_name", "middle_name", "last_name", "email", "phone_number", "national_id", "fan_number")
+PROGRESS_EVERY_SECONDS = 2.0
+
+
+# -----------------------------
+# POOL SIDE
+# -----------------------------
+
+def _init_pool() -> None:
+    # Compile the graph once per process rather than once per CV
+    from nodes.graph_builder import get_cv_graph
+
+    get_cv_graph()
+
+
+def _verify(path: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Compact result for `path`, carrying its `timings` and `raw_evidence`
+    back from the pool; `on_result` splits them off."""
+    from nodes.graph_builder import run_cv_graph
+    from nodes.results import summarize
+
+    try:
+        state = run_cv_graph(path)
+    except Exception as e:
+        return None, str(e)
+    timings = state.pop("timings", None)
+    result, evidence = summarize(state)
+    result["timings"] = timings
+    result["raw_evidence"] = evidence
+    return result, None
+
+
+def run_pool(tasks: Iterator[dict], workers: int, on_result: Callable[[dict, Optional[dict], Optional[str]], None]) -> None:
+    """Run `_verify` for every task that has no `result` yet.
+
+    At most two tasks per worker are in flight, so a large import does not
+    hash and queue every file up front.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_pool) as pool:
+        in_flight: Dict = {}
+
+        def drain(block_until: int) -> None:
+            while len(in_flight) > block_until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    task = in_flight.pop(fut)
+                    try:
+                        result, error = fut.result()
+                    except Exception as e:
+                        # e.g. BrokenProcessPool: a worker died; fail this task, not the run
+                        result, error = None, f"{type(e).__name__}: {e}"
+                    on_result(task, result, error)
+
+        for task in tasks:
+            if "result" in task:
+                on_result(task, task["result"], None)
+                continue
+            drain(2 * workers - 1)
+            in_flight[pool.submit(_verify, task["path"])] = task
+        drain(0)
+
+
+# -----------------------------
+# WRITES AND PROGRESS
+# -----------------------------
+
+class BulkWriter:
+    """Buffers upserts and flushes them in batches, then records progress."""
+
+    def __init__(self, db, progress_path: str, batch_size: int, total: Optional[int] = None):
+        self.requests = db[REQUESTS_COLLECTION]
+        self.results = db[CV_RESULTS_COLLECTION]
+        self.evidence = db[CV_EVIDENCE_COLLECTION] if CV_STORE_EVIDENCE else None
+        self.daily_stats = db[DAILY_STATS_COLLECTION]
+        self.progress_path = progress_path
+        self.batch_size = batch_size
+        self.total = total
+        self.ops: List[UpdateOne] = []
+        # created_at of each op that inserts a request when upserted
+        self.created_at: List[Optional[datetime]] = []
+        self.result_ops: List[UpdateOne] = []
+        self.evidence_ops: List[InsertOne] = []
+        self.keys: List[str] = []
+        self.counts = {"processed": 0, "cached": 0, "failed": 0, "skipped": 0, "inserted": 0}
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def add(self, key: str, ops: List[UpdateOne], created_at: Optional[datetime] = None) -> None:
+        for op in ops:
+            self.ops.append(op)
+            self.created_at.append(created_at)
+        self.keys.append(key)
+        if len(self.ops) >= self.batch_size:
+            self.flush()
+
+    def add_result(self, sha256: Optional[str], result: dict, evidence: Optional[dict] = None) -> None:
+        """Queue the cache entry and evidence for a fresh result; links the
+        evidence from `result`."""
+        if sha256 and evidence is not None and self.evidence is not None:
+            # A new entry per run, never an overwrite (see app/evidence.py)
+            evidence_id = new_evidence_id(sha256)
+            self.evidence_ops.append(InsertOne(
+                {"_id": evidence_id, "evidence": evidence, "computed_at": datetime.now(timezone.utc)}
+            ))
+            result["evidence"] = evidence_id
+        # Results scored while a service was down are not reused
+        if sha256 and not result.get("degraded"):
+            self.result_ops.append(UpdateOne(
+                {"_id": sha256},
+                {"$set": {"result": result, "computed_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            ))
+
+    def flush(self, report: bool = True) -> None:
+        if self.result_ops:
+            self.results.bulk_write(self.result_ops, ordered=False)
+        if self.evidence_ops:
+            self.evidence.bulk_write(self.evidence_ops, ordered=False)
+        if self.ops:
+            res = self.requests.bulk_write(self.ops, ordered=False)
+            inserted = [self.created_at[i] for i in res.upserted_ids if self.created_at[i] is not None]
+            if inserted:
+                record_submissions(self.daily_stats, inserted)
+                self.counts["inserted"] += len(inserted)
+        # Only keys whose writes succeeded are marked done
+        if self.keys:
+            with open(self.progress_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{k}\n" for k in self.keys)
+        self.ops, self.created_at, self.result_ops, self.evidence_ops, self.keys = [], [], [], [], []
+        if report:
+            self.report()
+
+    def report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last_report < PROGRESS_EVERY_SECONDS:
+            return
+        self._last_report = now
+        done = self.counts["processed"] + self.counts["failed"] + self.counts["skipped"]
+        rate = self.counts["processed"] / max(now - self.started, 1e-9)
+        of = f"/{self.total}" if self.total is not None else ""
+        eta = f", eta {(self.total - done) / rate:.0f}s" if self.total is not None and rate > 0 else ""
+        print(f"[bulk] {done}{of} done ({self.counts['cached']} cached, {self.counts['failed']} failed), {rate:.1f} CVs/s{eta}")
+
+    def summary(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {**self.counts, "seconds": round(seconds, 1), "cvs_per_sec": round(self.counts["processed"] / max(seconds, 1e-9), 2)}
+
+
+def load_progress(path: str) -> Set[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+# -----------------------------
+# IMPORT
+# -----------------------------
+
+def _parse_created_at(value) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def read_rows(source: str) -> Iterator[Tuple[str, str, dict]]:
+    """Yield (key, file path, row) for a directory or a .jsonl/.csv manifest."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if os.path.splitext(name)[1].lower() in MAGIC:
+                yield name, os.path.join(source, name), {}
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8", newline="") as f:
+        if source.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            path = row.get("path")
+            if not path:
+                continue
+            yield path, os.path.join(base, path), row
+
+
+def store_file(path: str, ext: str) -> Tuple[str, str]:
+    """Copy a CV into CV_FILES_DIR under its SHA-256, like an upload."""
+    tmp_path = os.path.join(CV_FILES_DIR, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        head = src.read(8)
+        if not head.startswith(MAGIC[ext]):
+            dst.close()
+            os.remove(tmp_path)
+            raise ValueError(f"content is not a valid {ext} document")
+        chunk = head
+        while chunk:
+            digest.update(chunk)
+            dst.write(chunk)
+            chunk = src.read(1024 * 1024)
+    sha256 = digest.hexdigest()
+    stored_name = f"{sha256}{ext}"
+    final_path = os.path.join(CV_FILES_DIR, stored_name)
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    return stored_name, sha256
+
+
+def run_import(db, source: str, workers: int, batch_size: int, progress_path: str) -> dict:
+    os.makedirs(CV_FILES_DIR, exist_ok=True)
+    done = load_progress(progress_path)
+    rows = [r for r in read_rows(source) if r[0] not in done]
+    writer = BulkWriter(db, progress_path, batch_size, total=len(rows))
+    results_col = db[CV_RESULTS_COLLECTION]
+    # sha256 -> tasks waiting on the same file's result
+    followers: Dict[str, List[dict]] = {}
+    # sha256 -> results computed in this run; their cache writes may still be
+    # buffered in the writer, so get_cached_result would not see them yet
+    finished: Dict[str, dict] = {}
+    if done:
+        print(f"[bulk] resuming: {len(done)} already imported")
+
+    def tasks() -> Iterator[dict]:
+        for key, path, row in rows:
+            ext = os.path.splitext(path)[1].lower()
+            try:
+                if ext not in MAGIC:
+                    raise ValueError("only PDF or Word documents can be imported")
+                stored_name, sha256 = store_file(path, ext)
+                created_at = _parse_created_at(row.get("created_at"))
+            except (OSError, ValueError) as e:
+                print(f"[bulk] skipping {key}: {e}")
+                writer.counts["skipped"] += 1
+                continue
+            task = {
+                "key": key,
+                "sha256": sha256,
+                "path": cv_abs_path({"cv_path": stored_name}),
+                "request": {
+                    "status": "pending",
+                    "candidate": {f: row.get(f) or None for f in CANDIDATE_FIELDS},
+                    "cv_path": stored_name,
+                    "cv_sha256": sha256,
+                    "created_at": created_at or datetime.now(timezone.utc),
+                },
+            }
+            # Files already seen in this run wait for that result instead
+            if sha256 in followers:
+                followers[sha256].append(task)
+                continue
+            cached = finished.get(sha256) or get_cached_result(results_col, sha256)
+            if cached is not None:
+                task["result"] = cached
+                task["cached"] = True
+            else:
+                followers[sha256] = []
+            yield task
+
+    def on_result(task: dict, result: Optional[dict], error: Optional[str]) -> None:
+        timings = result.pop("timings", None) if result else None
+        evidence = result.pop("raw_evidence", None) if result else None
+        record(task, result, error, timings, evidence)
+        if error is None:
+            finished[task["sha256"]] = result
+        for follower in followers.pop(task["sha256"], []):
+            follower["cached"] = True
+            record(follower, result, error)
+
+    def record(
+        task: dict, result: Optional[dict], error: Optional[str],
+        timings: Optional[dict] = None, evidence: Optional[dict] = None,
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        request = task["request"]
+        update = {"$setOnInsert": request}
+        if error is not None:
+            # Leave it to the worker pool, which retries with backoff
+            print(f"[bulk] {task['key']} failed, queued for the workers: {error}")
+            writer.counts["failed"] += 1
+            update["$set"] = {"job": new_job(now)}
+        else:
+            if task.get("cached"):
+                writer.counts["cached"] += 1
+                job = cached_job(now)
+            else:
+                writer.add_result(task["sha256"], result, evidence)
+                job = {"state": DONE, "attempts": 1, "available_at": now, "finished_at": now, "cache_hit": False}
+            writer.counts["processed"] += 1
+            update["$set"] = {"graph_results": result, "processed_at": now, "job": job}
+            if timings:
+                update["$set"]["timings"] = timings
+        op = UpdateOne(
+            {"cv_sha256": task["sha256"], "candidate.email": request["candidate"]["email"]},
+            update,
+            upsert=True,
+        )
+        writer.add(task["key"], [op], request["created_at"])
+
+    try:
+        run_pool(tasks(), workers, on_result)
+    finally:
+        # Keep what finished even when the pool breaks; a rerun resumes after it
+        writer.flush(report=False)
+    writer.report(force=True)
+    return writer.summary()
+
+
+# -----------------------------
+# RE-VERIFY
+# -----------------------------
+
+def run_reverify(db, status: Optional[str], workers: int, batch_size: int, progress_path: str) -> dict:
+    done = load_progress(progress_path)
+    query = {"cv_path": {"$exists": True}, "job.state": {"$ne": RUNNING}}
+    if status:
+        query["status"] = status
+
+    # Requests sharing one stored file run the graph once
+    by_path: Dict[str, dict] = {}
+    for doc in db[REQUESTS_COLLECTION].find(query, {"cv_path": 1, "cv_sha256": 1}).sort("_id", 1):
+        if str(doc["_id"]) in done:
+            continue
+        path = cv_abs_path(doc)
+        task = by_path.setdefault(path, {"path": path, "sha256": doc.get("cv_sha256"), "ids": []})
+        task["ids"].append(doc["_id"])
+    if done:
+        print(f"[bulk] resuming: {len(done)} already re-verified")
+
+    writer = BulkWriter(db, progress_path, batch_size, total=sum(len(t["ids"]) for t in by_path.values()))
+
+    def on_result(task: dict, result: Optional[dict], error: Optional[str]) -> None:
+        if error is not None:
+            # Existing results stay in place; a rerun retries these
+            print(f"[bulk] {task['path']} failed: {error}")
+            writer.counts["failed"] += len(task["ids"])
+            return
+        now = datetime.now(timezone.utc)
+        timings = result.pop("timings", None)
+        evidence = result.pop("raw_evidence", None)
+        writer.add_result(task["sha256"], result, evidence)
+        for _id in task["ids"]:
+            writer.counts["processed"] += 1
+            writer.add(str(_id), [UpdateOne(
+                # never overwrite a job a worker is running right now
+                {"_id": _id, "job.state": {"$ne": RUNNING}},
+                {"$set": {
+                    "graph_results": result,
+                    "processed_at": now,
+                    "job.state": DONE,
+                    "job.finished_at": now,
+                    "job.error": None,
+                    "job.cache_hit": False,
+                    "timings": timings,
+                }},
+            )])
+
+    try:
+        run_pool(iter(by_path.values()), workers, on_result)
+    finally:
+        writer.flush(report=False)
+    writer.report(force=True)
+    return writer.summary()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import CVs or re-run verification for existing requests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a directory of CVs or a .jsonl/.csv manifest")
+    imp.add_argument("source", help="Directory or manifest file")
+    rev = sub.add_parser("reverify", help="Re-run the graph for existing requests")
+    rev.add_argument("--status", choices=["pending", "approved", "rejected"], help="Only requests with this status")
+    for p in (imp, rev):
+        p.add_argument("--workers", type=int, default=BULK_WORKERS, help="Graph processes")
+        p.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="Upserts per bulk_write")
+        p.add_argument("--progress-file", default=None, help="Resume log (default: bulk-<command>.progress)")
+        p.add_argument("--restart", action="store_true", help="Ignore an existing progress file")
+
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.batch_size < 1:
+        raise SystemExit("--workers and --batch-size must be at least 1")
+    progress_path = args.progress_file or f"bulk-{args.command}.progress"
+    if args.restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    from app.db import db
+
+    if args.command == "import":
+        summary = run_import(db, args.source, args.workers, args.batch_size, progress_path)
+    else:
+        summary = run_reverify(db, args.status, args.workers, args.batch_size, progress_path)
+
+    if summary["failed"] == 0 and os.path.exists(progress_path):
+        os.remove(progress_path)
+    print({"command": args.command, **summary})
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,55 @@ SECRET_KEY = os.getenv("SECRET_KEY") or os.getenv("JWT_SECRET_KEY", "super-secre
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# Authenticated admin lookups are cached per process (see app/auth.py); a
+# deleted or changed admin keeps access for up to this long
+ADMIN_CACHE_TTL_SECONDS = float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "60"))
+ADMIN_CACHE_MAX_ENTRIES = int(os.getenv("ADMIN_CACHE_MAX_ENTRIES", "1024"))
+# Trust a token's signed claims without any lookup for this long after it was
+# issued; 0 (default) always checks the admin still exists
+ADMIN_TRUST_CLAIMS_SECONDS = float(os.getenv("ADMIN_TRUST_CLAIMS_SECONDS", "0"))
+
 # Collections
 ADMIN_COLLECTION = os.getenv("ADMIN_COLLECTION", "admins")
 REQUESTS_COLLECTION = os.getenv("REQUESTS_COLLECTION", "requests")
+DAILY_STATS_COLLECTION = os.getenv("DAILY_STATS_COLLECTION", "daily_stats")
 
 # Optional base directory for CV files (used by download endpoint)
 CV_FILES_DIR = os.getenv("CV_FILES_DIR", os.path.join("server", "data", "cv_files"))
 
+# Background CV processing (see app/jobs.py and `python -m app.worker`)
+CV_WORKER_CONCURRENCY = int(os.getenv("CV_WORKER_CONCURRENCY", "2"))
+CV_JOB_MAX_ATTEMPTS = int(os.getenv("CV_JOB_MAX_ATTEMPTS", "3"))
+CV_JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("CV_JOB_RETRY_BACKOFF_SECONDS", "30"))
+CV_JOB_STALE_SECONDS = float(os.getenv("CV_JOB_STALE_SECONDS", "600"))
+CV_WORKER_POLL_SECONDS = float(os.getenv("CV_WORKER_POLL_SECONDS", "1"))
+# First port of the workers' per-process /metrics endpoints; 0 disables them
+CV_WORKER_METRICS_PORT = int(os.getenv("CV_WORKER_METRICS_PORT", "0"))
+
+# Content-hash cache of graph results; 0 keeps cached results forever
+CV_RESULTS_COLLECTION = os.getenv("CV_RESULTS_COLLECTION", "cv_results")
+CV_RESULT_CACHE_TTL_SECONDS = float(os.getenv("CV_RESULT_CACHE_TTL_SECONDS", "0"))
+
+# Raw evidence (commits, search results, verdict details) behind each result,
+# stored apart from the request documents (see app/evidence.py)
+CV_EVIDENCE_COLLECTION = os.getenv("CV_EVIDENCE_COLLECTION", "cv_evidence")
+CV_STORE_EVIDENCE = os.getenv("CV_STORE_EVIDENCE", "1").lower() not in ("0", "false", "no")
+
+# Seconds dashboard stats are served from the per-process cache
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+
+# Longest the readiness probe waits for MongoDB to answer a ping
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+# CV downloads: candidate -> file lookups cached per process, and how long
+# browsers may reuse a downloaded CV before revalidating
+CV_DOWNLOAD_CACHE_TTL_SECONDS = float(os.getenv("CV_DOWNLOAD_CACHE_TTL_SECONDS", "600"))
+CV_DOWNLOAD_CACHE_MAX_ENTRIES = int(os.getenv("CV_DOWNLOAD_CACHE_MAX_ENTRIES", "2048"))
+CV_DOWNLOAD_MAX_AGE_SECONDS = int(os.getenv("CV_DOWNLOAD_MAX_AGE_SECONDS", "3600"))
+
+# Largest CV accepted by the submission endpoints
+CV_MAX_UPLOAD_BYTES = int(os.getenv("CV_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# Bulk import / re-verification CLI (see app/bulk.py)
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(os.cpu_count() or 1)))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "100"))
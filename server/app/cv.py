@@ -1,22 +1,26 @@
 import os
-import uuid
 from datetime import datetime, timezone
 from typing import List
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import FileResponse
+from pymongo import ReturnDocument
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 
 import app.db as db_module
+from app.db import run_db
 from app.auth import get_current_admin
-from app.config import REQUESTS_COLLECTION, CV_FILES_DIR
+from app.config import REQUESTS_COLLECTION, DAILY_STATS_COLLECTION, CV_FILES_DIR, CV_RESULTS_COLLECTION
+from app.downloads import cv_file_response
+from app.daily_stats import record_status_change, record_submission
+from app.jobs import cached_job, new_job
+from app.pagination import list_page
+from app.result_cache import get_cached_result
+from app.uploads import MAGIC, save_upload
 from app.schemas import Stats, StatusUpdate
+from app.stats import get_request_stats, invalidate_stats
 
 router = APIRouter(prefix="/api/v1", tags=["Recruitment"])
 
-from nodes.graph_builder import run_cv_graph
-from bson import ObjectId
-
 def _serialize_doc(doc: dict) -> dict:
     """Helper to convert MongoDB _id to string 'id'."""
     if not doc: 
@@ -43,34 +47,24 @@ async def submit_cv(
     national_id: str = Form(None),
     fan_number: str = Form(None),
     cv_file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None
 ):
     """
     Handles candidate CV submission. 
-    Saves the file to disk and the metadata to MongoDB.
+    Saves the file to disk and the metadata to MongoDB, and queues the CV
+    for verification by the worker pool (`python -m app.worker`).
     """
     # Validate File Extension
     ext = os.path.splitext(cv_file.filename or "")[1].lower()
-    if ext not in [".pdf", ".doc", ".docx"]:
+    if ext not in MAGIC:
         raise HTTPException(status_code=400, detail="Only PDF or Word documents allowed")
 
     _ensure_upload_dir()
-    
-    # Create unique filename
-    unique_name = f"{uuid.uuid4().hex}{ext}"
-    file_path = os.path.join(CV_FILES_DIR, unique_name)
-    abs_path = os.path.abspath(file_path)
-
-    # Save file using chunked reading for memory efficiency
-    try:
-        with open(file_path, "wb") as buffer:
-            while chunk := await cv_file.read(1024 * 1024): # 1MB chunks
-                buffer.write(chunk)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to write file to disk")
+    stored_name, sha256 = await save_upload(cv_file, ext)
 
-    # Save to DB
+    # Save to DB; the embedded job is picked up by the worker pool unless a
+    # previous upload of the same file already has a result
     try:
+        now = datetime.now(timezone.utc)
         new_candidate = {
             "status": "pending",
             "candidate": {
@@ -82,64 +76,70 @@ async def submit_cv(
                 "national_id": national_id,
                 "fan_number": fan_number,
             },
-            "cv_path": unique_name,  # Store relative path for portability
-            "created_at": datetime.now(timezone.utc)
+            "cv_path": stored_name,  # Store relative path for portability
+            "cv_sha256": sha256,
+            "created_at": now,
         }
-        res = db_module.db[REQUESTS_COLLECTION].insert_one(new_candidate)
+        cached = await run_db(get_cached_result, db_module.db[CV_RESULTS_COLLECTION], sha256)
+        if cached is not None:
+            new_candidate["graph_results"] = cached
+            new_candidate["processed_at"] = now
+            new_candidate["job"] = cached_job(now)
+        else:
+            new_candidate["job"] = new_job(now)
+        res = await run_db(db_module.db[REQUESTS_COLLECTION].insert_one, new_candidate)
     except Exception:
-        # Cleanup: remove the file if DB insertion fails
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # The stored file may be shared with earlier submissions, so it stays
         raise HTTPException(status_code=500, detail="Database insertion failed")
 
-    def _process_and_persist(path: str, cand_id: ObjectId):
-        try:
-            result = run_cv_graph(path)
-        except Exception as e:
-            result = {"error": str(e)}
-        # Print results so they appear in server logs
-        try:
-            print(f"[graph] Candidate {cand_id} processed. Result:\n{result}")
-        except Exception:
-            pass
-        try:
-            db_module.db[REQUESTS_COLLECTION].update_one(
-                {"_id": cand_id},
-                {"$set": {"graph_results": result, "processed_at": datetime.now(timezone.utc)}}
-            )
-        except Exception:
-            # swallow DB persistence errors to avoid crashing background task
-            pass
-
-    # Schedule graph processing in background so upload response is fast
     try:
-        if background_tasks is not None:
-            background_tasks.add_task(_process_and_persist, abs_path, res.inserted_id)
-        else:
-            _process_and_persist(abs_path, res.inserted_id)
+        await run_db(record_submission, db_module.db[DAILY_STATS_COLLECTION], now)
     except Exception:
-        # Do not block the response on graph processing failure
+        # The request is stored; a missed counter is fixed by the backfill
         pass
-
+    invalidate_stats()
     return {"message": "Application received successfully", "id": str(res.inserted_id)}
 
 # --- 2. DASHBOARD STATS (Admin Only) ---
 @router.get("/dashboard/stats", response_model=Stats)
 async def get_stats(admin: dict = Depends(get_current_admin)):
-    col = db_module.db[REQUESTS_COLLECTION]
-    return {
-        "total_requests": col.count_documents({}),
-        "approved": col.count_documents({"status": "approved"}),
-        "rejected": col.count_documents({"status": "rejected"}),
-        "pending": col.count_documents({"status": "pending"})
-    }
+    return await run_db(get_request_stats, db_module.db[REQUESTS_COLLECTION])
 
 # --- 3. CANDIDATE MANAGEMENT (Admin Only) ---
 @router.get("/candidates")
-async def list_candidates(status: str = None, admin: dict = Depends(get_current_admin)):
-    query = {"status": status} if status else {}
-    cursor = db_module.db[REQUESTS_COLLECTION].find(query).sort("created_at", -1)
-    return [_serialize_doc(d) for d in cursor]
+async def list_candidates(
+    response: Response,
+    status: str = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str = None,
+    skip: int = Query(0, ge=0),
+    admin: dict = Depends(get_current_admin),
+):
+    # Body stays a plain list of lean rows; the next page's cursor is a header
+    try:
+        docs, next_cursor = await run_db(
+            list_page, db_module.db[REQUESTS_COLLECTION], status, limit, cursor, skip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_serialize_doc(d) for d in docs]
+
+def _set_status(obj_id: ObjectId, status: str) -> bool:
+    """Update a request's status and the daily counters; False if it does not exist."""
+    before = db_module.db[REQUESTS_COLLECTION].find_one_and_update(
+        {"_id": obj_id},
+        {"$set": {"status": status, "status_updated_at": datetime.now(timezone.utc)}},
+        projection={"status": 1, "created_at": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is None:
+        return False
+    record_status_change(
+        db_module.db[DAILY_STATS_COLLECTION], before.get("created_at"), before.get("status"), status
+    )
+    return True
 
 @router.patch("/candidates/{c_id}/status")
 async def update_candidate_status(c_id: str, data: StatusUpdate, admin: dict = Depends(get_current_admin)):
@@ -148,35 +148,11 @@ async def update_candidate_status(c_id: str, data: StatusUpdate, admin: dict = D
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    res = db_module.db[REQUESTS_COLLECTION].update_one(
-        {"_id": obj_id},
-        {"$set": {"status": data.status, "status_updated_at": datetime.now(timezone.utc)}}
-    )
-    if res.matched_count == 0:
+    if not await run_db(_set_status, obj_id, data.status):
         raise HTTPException(status_code=404, detail="Candidate not found")
+    invalidate_stats()
     return {"message": f"Status updated to {data.status}"}
 
 @router.get("/candidates/{c_id}/download")
-async def download_cv(c_id: str, admin: dict = Depends(get_current_admin)):
-    try:
-        obj_id = ObjectId(c_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid ID format")
-
-    candidate = db_module.db[REQUESTS_COLLECTION].find_one({"_id": obj_id})
-    if not candidate or "cv_path" not in candidate:
-        raise HTTPException(status_code=404, detail="CV file not found in database")
-    
-    # Reconstruct the absolute path
-    full_path = os.path.join(CV_FILES_DIR, candidate["cv_path"])
-    
-    if not os.path.exists(full_path):
-        raise HTTPException(status_code=404, detail="Physical file missing from server storage")
-
-    # Clean filename for the downloader
-    last_name = candidate.get("candidate", {}).get("last_name", "download")
-    return FileResponse(
-        path=full_path,
-        filename=f"CV_{last_name}.pdf",
-        media_type="application/pdf"
-    )
\ No newline at end of file
+async def download_cv(c_id: str, request: Request, admin: dict = Depends(get_current_admin)):
+    return await cv_file_response(request, c_id)
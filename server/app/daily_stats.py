@@ -0,0 +1,119 @@
+"""Pre-aggregated per-day submission counters for the dashboard graph.
+
+One document per submission day in `DAILY_STATS_COLLECTION`:
+
+  { _id: 'YYYY-MM-DD', total, pending, approved, rejected }
+
+Requests are counted on the day they were submitted. `submit_cv` adds to
+`total` and `pending`; a status change moves one count from the old status
+to the new one on the request's submission day. Both are `$inc` upserts, so
+the graph reads one small document per day instead of grouping the whole
+`requests` collection. `python -m app.seed --backfill-daily-stats` rebuilds
+the collection from existing requests.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+from typing import List, Optional
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+STATUSES = ("pending", "approved", "rejected")
+
+
+def day_key(when: datetime) -> str:
+    return when.strftime("%Y-%m-%d")
+
+
+def _status_field(status: Optional[str]) -> Optional[str]:
+    # missing/null status means not reviewed yet
+    status = status or "pending"
+    return status if status in STATUSES else None
+
+
+def record_submission(col: Collection, created_at: datetime) -> None:
+    col.update_one({"_id": day_key(created_at)}, {"$inc": {"total": 1, "pending": 1}}, upsert=True)
+
+
+def record_submissions(col: Collection, created_ats: List[datetime]) -> None:
+    """`record_submission` for many requests at once, one upsert per day."""
+    per_day = Counter(day_key(c) for c in created_ats)
+    if per_day:
+        col.bulk_write(
+            [UpdateOne({"_id": day}, {"$inc": {"total": n, "pending": n}}, upsert=True) for day, n in per_day.items()],
+            ordered=False,
+        )
+
+
+def record_status_change(
+    col: Collection,
+    created_at: Optional[datetime],
+    old_status: Optional[str],
+    new_status: Optional[str],
+) -> None:
+    """Move one count between status fields on the request's submission day."""
+    if created_at is None:
+        return
+    old_field, new_field = _status_field(old_status), _status_field(new_status)
+    if old_field == new_field:
+        return
+    inc = {}
+    if old_field:
+        inc[old_field] = -1
+    if new_field:
+        inc[new_field] = 1
+    col.update_one({"_id": day_key(created_at)}, {"$inc": inc}, upsert=True)
+
+
+def read_daily_stats(col: Collection, start: Optional[date] = None, end: Optional[date] = None) -> List[dict]:
+    """Per-day counters between `start` and `end` (inclusive), oldest first."""
+    query = {}
+    if start or end:
+        query["_id"] = {}
+        if start:
+            query["_id"]["$gte"] = start.isoformat()
+        if end:
+            query["_id"]["$lte"] = end.isoformat()
+    return [
+        {
+            "date": d["_id"],
+            "total": d.get("total", 0),
+            "approved": d.get("approved", 0),
+            "rejected": d.get("rejected", 0),
+            "pending": d.get("pending", 0),
+        }
+        for d in col.find(query).sort("_id", 1)
+    ]
+
+
+def backfill_daily_stats(requests_col: Collection, stats_col: Collection) -> int:
+    """Rebuild every day's counters from `requests`. Returns the number of days."""
+    pipeline = [
+        {"$match": {"created_at": {"$exists": True}}},
+        {
+            "$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "total": {"$sum": 1},
+                "approved": {"$sum": {"$cond": [{"$eq": ["$status", "approved"]}, 1, 0]}},
+                "rejected": {"$sum": {"$cond": [{"$eq": ["$status", "rejected"]}, 1, 0]}},
+                "pending": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$status", "pending"]}, "pending"]}, 1, 0]}},
+            }
+        },
+    ]
+    rows = list(requests_col.aggregate(pipeline))
+    if rows:
+        stats_col.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": d["_id"]},
+                    {"$set": {k: d[k] for k in ("total", "approved", "rejected", "pending")}},
+                    upsert=True,
+                )
+                for d in rows
+            ],
+            ordered=False,
+        )
+    # drop days that no longer have any requests
+    stats_col.delete_many({"_id": {"$nin": [d["_id"] for d in rows]}})
+    return len(rows)
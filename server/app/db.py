@@ -1,6 +1,27 @@
-from pymongo import MongoClient
+"""MongoDB access layer.
+
+The client is created lazily on first use (or by the app lifespan), never at
+import time, so importing the app does not block on an unreachable server.
+`db` keeps the familiar `db[collection]` interface.
+
+pymongo is synchronous. Async routes must not call it directly, since every
+call would block the event loop; they go through `run_db`, which runs the
+call on a dedicated, size-limited thread pool.
+"""
+
+import asyncio
+import functools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pymongo
 from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from app.metrics import MongoMetrics
 
 # Load environment variables from .env
 load_dotenv()
@@ -8,16 +29,79 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB", "cv_verifier")
 
-try:
-    # Connect to MongoDB
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB]
+# Connection pool and timeouts (milliseconds)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+
+# Threads available to async routes for database calls; more than the pool
+# size is pointless since extra threads would just wait for a connection
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(MONGO_MAX_POOL_SIZE)))
+
+_client: Optional[MongoClient] = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="mongo")
+
+
+def get_client() -> MongoClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    # Do not open sockets until the first operation
+                    connect=False,
+                    # Command counts and latencies for /metrics
+                    event_listeners=[MongoMetrics()],
+                )
+    return _client
+
+
+def get_db() -> Database:
+    return get_client()[MONGO_DB]
+
+
+def close_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+class _LazyDatabase:
+    """Stand-in for `client[MONGO_DB]` that creates the client on first access."""
+
+    def __getitem__(self, name: str):
+        return get_db()[name]
+
+    def __getattr__(self, name: str):
+        return getattr(get_db(), name)
+
+
+db = _LazyDatabase()
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking pymongo call on the database thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
 
-    # Simple test: list collections
-    collections = db.list_collection_names()
-    print(f"✅ Connected to MongoDB database '{MONGO_DB}'")
-    print(f"Existing collections: {collections}")
 
-except Exception as e:
-    print("❌ Could not connect to MongoDB")
-    print(e)
+def ping(timeout: Optional[float] = None) -> bool:
+    """True if the server answers within `timeout` seconds (default: the
+    server selection timeout)."""
+    try:
+        with pymongo.timeout(timeout):
+            get_client().admin.command("ping")
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,170 @@
+"""CV file downloads.
+
+Uploads are content-addressed and never rewritten, so the file behind a
+candidate does not change. The lookup from candidate id to file path, download
+name and media type is cached per process, and repeat downloads skip MongoDB
+entirely; the bytes come from the OS page cache.
+
+Responses carry an ETag (the file's SHA-256 when known) and Last-Modified, so
+`If-None-Match` / `If-Modified-Since` revalidations get a bodiless 304, and
+byte ranges are served by Starlette's FileResponse. When the ASGI server
+supports the `http.response.pathsend` extension the body is handed to it as a
+path and sent with sendfile instead of being copied through Python.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+import app.db as db_module
+from app.config import (
+    REQUESTS_COLLECTION,
+    CV_FILES_DIR,
+    CV_DOWNLOAD_CACHE_TTL_SECONDS,
+    CV_DOWNLOAD_CACHE_MAX_ENTRIES,
+    CV_DOWNLOAD_MAX_AGE_SECONDS,
+)
+from app.db import run_db
+
+MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# {candidate id: (expires_at, (path, download name, media type, sha256))}
+_file_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_file_cache_lock = threading.Lock()
+_file_cache_counters = {"hits": 0, "misses": 0}
+
+
+def file_cache_stats() -> dict:
+    with _file_cache_lock:
+        return {**_file_cache_counters, "size": len(_file_cache)}
+
+
+def invalidate_cv_file(c_id: Optional[str] = None) -> None:
+    """Drop a cached lookup (or all of them) after a request's file changes."""
+    with _file_cache_lock:
+        if c_id is None:
+            _file_cache.clear()
+        else:
+            _file_cache.pop(str(c_id), None)
+
+
+def _describe(doc: dict) -> Tuple[str, str, str, Optional[str]]:
+    # Handles both absolute and relative paths stored in the DB
+    path = doc["cv_path"]
+    if not os.path.isabs(path):
+        path = os.path.join(CV_FILES_DIR, path)
+    ext = os.path.splitext(path)[1].lower()
+    last_name = (doc.get("candidate") or {}).get("last_name") or "Candidate"
+    return path, f"CV_{last_name}{ext}", MEDIA_TYPES.get(ext, "application/octet-stream"), doc.get("cv_sha256")
+
+
+def _lookup_file(c_id: str, obj_id: ObjectId) -> Optional[tuple]:
+    now = time.monotonic()
+    with _file_cache_lock:
+        entry = _file_cache.get(c_id)
+        if entry is not None and entry[0] > now:
+            _file_cache.move_to_end(c_id)
+            _file_cache_counters["hits"] += 1
+            return entry[1]
+        _file_cache_counters["misses"] += 1
+
+    doc = db_module.db[REQUESTS_COLLECTION].find_one(
+        {"_id": obj_id}, {"cv_path": 1, "cv_sha256": 1, "candidate.last_name": 1}
+    )
+    if not doc or "cv_path" not in doc:
+        return None
+    info = _describe(doc)
+    with _file_cache_lock:
+        _file_cache[c_id] = (now + CV_DOWNLOAD_CACHE_TTL_SECONDS, info)
+        _file_cache.move_to_end(c_id)
+        while len(_file_cache) > CV_DOWNLOAD_CACHE_MAX_ENTRIES:
+            _file_cache.popitem(last=False)
+    return info
+
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class CVFileResponse(FileResponse):
+    """FileResponse that lets the server sendfile whole-file bodies."""
+
+    # Both overrides hook Starlette internals; tests/test_downloads.py pins
+    # the pathsend, 304 and If-Range behaviour so an upgrade fails there.
+
+    async def __call__(self, scope, receive, send) -> None:
+        self._pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send, send_header_only: bool) -> None:
+        if send_header_only or not self._pathsend:
+            return await super()._handle_simple(send, send_header_only)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+
+    def _should_use_range(self, http_if_range: str, stat_result: os.stat_result) -> bool:
+        # The stock check only knows the mtime-based ETag
+        return http_if_range in (self.headers["etag"], self.headers["last-modified"])
+
+
+async def cv_file_response(request: Request, c_id: str) -> Response:
+    """Serve a candidate's CV with range and conditional request support."""
+    try:
+        obj_id = ObjectId(c_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    info = await run_db(_lookup_file, c_id, obj_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="CV file not found in database")
+    path, filename, media_type, sha256 = info
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except OSError:
+        invalidate_cv_file(c_id)
+        raise HTTPException(status_code=404, detail="Physical file missing from server storage")
+
+    headers = {"Cache-Control": f"private, max-age={CV_DOWNLOAD_MAX_AGE_SECONDS}"}
+    if sha256:
+        # Stable across copies and restores, unlike the mtime-based default
+        headers["ETag"] = f'"{sha256}"'
+    response = CVFileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    if _not_modified(request, etag, last_modified):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Last-Modified": last_modified, "Cache-Control": headers["Cache-Control"]},
+        )
+    return response
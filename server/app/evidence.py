@@ -0,0 +1,34 @@
+"""Raw evidence behind graph results, kept out of the `requests` documents.
+
+`graph_results` holds the compact result (see nodes/results.py). The commits,
+search results and verdict details it was computed from live in
+`CV_EVIDENCE_COLLECTION`, one entry per graph run:
+
+  { _id: '<sha256 or request id>-<random>', evidence: {...}, computed_at }
+
+Entries are written once and never updated, so a later run of the same file
+(a cache refresh, a reverify, a degraded run) cannot change the evidence an
+earlier result points to. The result names its entry in
+`graph_results.evidence`; the detail endpoint loads it only when asked to.
+Set `CV_STORE_EVIDENCE=0` to not keep it at all.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo.collection import Collection
+
+
+def new_evidence_id(base: str) -> str:
+    """Id for the evidence of one run; `base` is the file's SHA-256 or the request id."""
+    return f"{base}-{uuid.uuid4().hex[:16]}"
+
+
+def store_evidence(col: Collection, evidence_id: str, evidence: dict) -> None:
+    col.insert_one({"_id": evidence_id, "evidence": evidence, "computed_at": datetime.now(timezone.utc)})
+
+
+def get_evidence(col: Collection, evidence_id: str) -> Optional[dict]:
+    entry = col.find_one({"_id": evidence_id}, {"evidence": 1})
+    return entry.get("evidence") if entry else None
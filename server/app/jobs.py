@@ -0,0 +1,179 @@
+"""Durable CV processing queue backed by the `requests` collection.
+
+Every request document carries a `job` sub-document:
+
+  { state: 'queued'|'running'|'done'|'failed', attempts, available_at,
+    claimed_at, worker, error, cache_hit }
+
+Workers claim jobs with a single `find_one_and_update`, so two workers never
+run the same CV. Failed attempts are re-queued with exponential backoff until
+`CV_JOB_MAX_ATTEMPTS`, and jobs left `running` by a crashed worker are put
+back in the queue once their claim is older than `CV_JOB_STALE_SECONDS`.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+from app.config import (
+    CV_FILES_DIR,
+    CV_JOB_MAX_ATTEMPTS,
+    CV_JOB_RETRY_BACKOFF_SECONDS,
+    CV_JOB_STALE_SECONDS,
+)
+from app.evidence import new_evidence_id, store_evidence
+from app.result_cache import get_cached_result, store_result
+from nodes.results import summarize
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def new_job(now: Optional[datetime] = None) -> dict:
+    """Job sub-document for a freshly submitted CV."""
+    now = now or datetime.now(timezone.utc)
+    return {"state": QUEUED, "attempts": 0, "available_at": now}
+
+
+def cached_job(now: Optional[datetime] = None) -> dict:
+    """Job sub-document for a CV whose result was reused from the cache."""
+    now = now or datetime.now(timezone.utc)
+    return {"state": DONE, "attempts": 0, "available_at": now, "finished_at": now, "cache_hit": True}
+
+
+def claim_job(col: Collection, worker_id: str) -> Optional[dict]:
+    """Atomically move the oldest due job to `running` and return its document."""
+    now = datetime.now(timezone.utc)
+    return col.find_one_and_update(
+        {"job.state": QUEUED, "job.available_at": {"$lte": now}},
+        {
+            "$set": {"job.state": RUNNING, "job.claimed_at": now, "job.worker": worker_id},
+            "$inc": {"job.attempts": 1},
+        },
+        sort=[("job.available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def complete_job(
+    col: Collection, doc: dict, result: dict, cache_hit: bool = False, timings: Optional[dict] = None
+) -> bool:
+    """Record the result; False when the job was requeued and now belongs to
+    another worker, in which case nothing is written."""
+    now = datetime.now(timezone.utc)
+    update = {
+        "graph_results": result,
+        "processed_at": now,
+        "job.state": DONE,
+        "job.finished_at": now,
+        "job.error": None,
+        "job.cache_hit": cache_hit,
+    }
+    if timings is not None:
+        update["timings"] = timings
+    res = col.update_one({"_id": doc["_id"], "job.worker": doc["job"]["worker"]}, {"$set": update})
+    return res.matched_count == 1
+
+
+def fail_job(col: Collection, doc: dict, error: str, timings: Optional[dict] = None) -> str:
+    """Re-queue the job with backoff, or mark it failed when out of attempts.
+
+    Returns the new job state.
+    """
+    now = datetime.now(timezone.utc)
+    attempts = doc["job"].get("attempts", 1)
+    if attempts < CV_JOB_MAX_ATTEMPTS:
+        delay = CV_JOB_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1))
+        update = {"job.state": QUEUED, "job.available_at": now + timedelta(seconds=delay)}
+    else:
+        update = {"job.state": FAILED, "job.finished_at": now, "graph_results": {"error": error}}
+    update["job.error"] = error
+    if timings is not None:
+        update["timings"] = timings
+    col.update_one({"_id": doc["_id"], "job.worker": doc["job"]["worker"]}, {"$set": update})
+    return update["job.state"]
+
+
+def requeue_stale_jobs(col: Collection, stale_seconds: float = CV_JOB_STALE_SECONDS) -> int:
+    """Recover jobs whose worker stopped reporting back to the queue.
+
+    Jobs with attempts left are queued again; the rest are marked failed so a
+    CV that keeps crashing its worker cannot loop forever. Returns the number
+    of jobs re-queued.
+    """
+    now = datetime.now(timezone.utc)
+    stale = {"job.state": RUNNING, "job.claimed_at": {"$lt": now - timedelta(seconds=stale_seconds)}}
+    col.update_many(
+        {**stale, "job.attempts": {"$gte": CV_JOB_MAX_ATTEMPTS}},
+        {"$set": {"job.state": FAILED, "job.finished_at": now, "job.worker": None,
+                  "job.error": "worker did not finish the job"}},
+    )
+    res = col.update_many(
+        stale,
+        {"$set": {"job.state": QUEUED, "job.available_at": now, "job.worker": None}},
+    )
+    return res.modified_count
+
+
+def cv_abs_path(doc: dict) -> str:
+    path = doc["cv_path"]
+    if not os.path.isabs(path):
+        path = os.path.join(CV_FILES_DIR, path)
+    return os.path.abspath(path)
+
+
+def process_job(
+    col: Collection,
+    doc: dict,
+    run,
+    cache_col: Optional[Collection] = None,
+    evidence_col: Optional[Collection] = None,
+) -> str:
+    """Run the graph for a claimed job and record the outcome.
+
+    `run` is the graph entry point (normally `run_cv_graph`); it is passed in
+    so the queue does not import the node graph itself. With `cache_col`, a
+    fresh cached result for the same file content is reused instead. The
+    compact result goes into `graph_results`; with `evidence_col`, the raw
+    evidence behind it is stored there (see app/evidence.py).
+    """
+    sha256 = doc.get("cv_sha256")
+    if cache_col is not None and sha256:
+        result = get_cached_result(cache_col, sha256)
+        if result is not None:
+            complete_job(col, doc, result, cache_hit=True)
+            return DONE
+
+    try:
+        result = run(cv_abs_path(doc))
+    except Exception as e:
+        return fail_job(col, doc, str(e), getattr(e, "timings", None))
+    # Node timings describe this run, not the file, so they stay out of the cache
+    timings = result.pop("timings", None)
+    result, evidence = summarize(result)
+    if evidence_col is not None:
+        result["evidence"] = new_evidence_id(sha256 or str(doc["_id"]))
+    # Print results so they appear in worker logs
+    print(f"[graph] Candidate {doc['_id']} processed. Result:\n{result}")
+    if timings:
+        print(f"[graph] Candidate {doc['_id']} timings: {timings}")
+    if not complete_job(col, doc, result, timings=timings):
+        # Requeued while we ran (see requeue_stale_jobs); the new owner records its own run
+        print(f"[graph] Candidate {doc['_id']} was taken over by another worker; result dropped")
+        return RUNNING
+    # Evidence and the cache entry only follow a result that was recorded.
+    # The result is already stored, so failing here must not fail the job.
+    try:
+        if evidence_col is not None:
+            store_evidence(evidence_col, result["evidence"], evidence)
+        # Results scored while a service was down are not reused for later uploads
+        if cache_col is not None and sha256 and not result.get("degraded"):
+            store_result(cache_col, sha256, result)
+    except Exception as e:
+        print(f"[graph] Candidate {doc['_id']}: could not store evidence or cache entry: {e}")
+    return DONE
@@ -1,10 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.auth import router as auth_router
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.auth import admin_cache_stats, router as auth_router
 from app.cv import router as cv_router
 from app.api_v1 import router as api_v1_router
+from app.config import READINESS_TIMEOUT_SECONDS, REQUESTS_COLLECTION
+from app.db import MONGO_DB, close_client, db, get_client, ping, run_db
+from app.downloads import file_cache_stats
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, add_collector, cache_collector, render, update_queue_depth
+from app.uploads import UploadLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the client here rather than at import; connect=False means this
+    # never blocks, and the pool connects on the first query
+    get_client()
+    yield
+    close_client()
+
 
-app = FastAPI(title="CV Verification API")
+app = FastAPI(title="CV Verification API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,14 +30,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the dashboard read the keyset pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
+# Oversized CVs are refused before the multipart parser spools them to disk
+app.add_middleware(UploadLimitMiddleware)
+# Outermost (added last), so requests the upload limit refuses are counted too
+app.add_middleware(MetricsMiddleware)
+
+add_collector(cache_collector("admin", admin_cache_stats))
+add_collector(cache_collector("cv_download", file_cache_stats))
 
 @app.get("/")
 def root():
     return {"message": "✅ CV Verification API running"}
 
+@app.get("/health/live")
+def liveness():
+    """The process is up; says nothing about its dependencies."""
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Ready only when MongoDB answers a ping within READINESS_TIMEOUT_SECONDS."""
+    if await run_db(ping, READINESS_TIMEOUT_SECONDS):
+        return {"status": "ready", "database": MONGO_DB}
+    return JSONResponse(status_code=503, content={"status": "unavailable", "database": MONGO_DB})
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this API process's metrics."""
+    try:
+        await run_db(update_queue_depth, db[REQUESTS_COLLECTION])
+    except Exception as e:
+        # Still serve everything else; the depth gauge keeps its last value
+        print(f"[metrics] queue depth unavailable: {e}")
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
 # These three lines include all the stats, download, and listing logic
 
 app.include_router(auth_router)
 app.include_router(cv_router)
-app.include_router(api_v1_router)
\ No newline at end of file
+app.include_router(api_v1_router)
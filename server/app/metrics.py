@@ -0,0 +1,372 @@
+"""Prometheus metrics in the text exposition format.
+
+The API serves them on `GET /metrics`; the worker serves its own on
+`--metrics-port` (one port per process, see app/worker.py), since the graph
+nodes and their external calls run there and not in the API process.
+
+  http_requests_total{method,route,status}      every router, via MetricsMiddleware
+  http_request_duration_seconds{method,route}   histogram
+  mongodb_commands_total{command,outcome}       every pymongo command, via MongoMetrics
+  mongodb_command_duration_seconds{command}     histogram
+  cv_graph_node_duration_seconds{node}          histogram, fed by nodes/tracing.py
+  cv_graph_node_errors_total{node}
+  external_requests_total{service,outcome}      GitHub, Tavily, Gemini
+  external_response_bytes_total{service}
+  cv_jobs_processed_total{state}                worker only
+  circuit_breaker_state{service,state}          worker only; 1 for the current state
+  cv_job_queue_depth{state}                     API only, counted at scrape time
+
+Counters and histograms are sharded per thread: an update touches only the
+calling thread's own list of floats and never takes a lock. A lock is taken
+once per thread per label set to register its shard, and at scrape time to
+copy the shard list, which are both rare.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers fast Mongo lookups up to multi-minute graph nodes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _Shards:
+    """Per-thread rows of `size` floats; writers never lock, readers sum the rows."""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._rows: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def row(self) -> List[float]:
+        try:
+            return self._local.row
+        except AttributeError:
+            row = [0.0] * self._size
+            with self._lock:
+                self._rows.append(row)
+            self._local.row = row
+            return row
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            rows = list(self._rows)
+        return [sum(col) for col in zip(*rows)] if rows else [0.0] * self._size
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.row()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {_fmt(child.value())}"]
+
+
+class _GaugeChild:
+    __slots__ = ("_value",)
+
+    def __init__(self):
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        # A single store; the last writer wins, which is what a gauge means
+        self._value = float(value)
+
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {_fmt(child.value())}"]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_shards")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # one slot per bucket, one for +Inf, then sum and count
+        self._shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        row = self._shards.row()
+        row[bisect.bisect_left(self._buckets, value)] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        totals = self._shards.totals()
+        return totals[:-2], totals[-2], totals[-1]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, key, child):
+        counts, total, count = child.snapshot()
+        lines = []
+        cumulative = 0.0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else _fmt(bound)
+            labels = self._label_str(key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {_fmt(cumulative)}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {_fmt(count)}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: List[_Metric] = []
+# Callbacks run at scrape time to refresh gauges from in-process state
+_collectors: List[Callable[[], None]] = []
+
+
+def add_collector(fn: Callable[[], None]) -> None:
+    _collectors.append(fn)
+
+
+def render() -> str:
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"[metrics] collector {getattr(collect, '__name__', collect)} failed: {e}")
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+MONGO_COMMANDS = Counter("mongodb_commands_total", "MongoDB commands by outcome.", ("command", "outcome"))
+MONGO_LATENCY = Histogram("mongodb_command_duration_seconds", "MongoDB command latency.", ("command",))
+NODE_LATENCY = Histogram("cv_graph_node_duration_seconds", "Wall time of each verification graph node.", ("node",))
+NODE_ERRORS = Counter("cv_graph_node_errors_total", "Verification graph nodes that raised.", ("node",))
+EXTERNAL_REQUESTS = Counter("external_requests_total", "Requests to external APIs by outcome.", ("service", "outcome"))
+EXTERNAL_BYTES = Counter("external_response_bytes_total", "Bytes exchanged with external APIs.", ("service",))
+JOBS_PROCESSED = Counter("cv_jobs_processed_total", "CV jobs finished by this worker, by resulting state.", ("state",))
+QUEUE_DEPTH = Gauge("cv_job_queue_depth", "CV jobs waiting or running, counted at scrape time.", ("state",))
+BREAKER_STATE = Gauge("circuit_breaker_state", "1 for each external service breaker's current state.", ("service", "state"))
+CACHE_STATS = Gauge("app_cache_stats", "Hit/miss counts and sizes of the in-process caches, read at scrape time.", ("cache", "stat"))
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware that counts and times every HTTP request.
+
+    Requests are labelled with the matched route's path template (e.g.
+    `/api/v1/requests/{c_id}`), not the raw path, so ids do not multiply the
+    series; anything no route matched is labelled `<unmatched>`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, template, status).inc()
+            HTTP_LATENCY.labels(method, template).observe(time.perf_counter() - start)
+
+
+# -----------------------------
+# MONGODB
+# -----------------------------
+
+class MongoMetrics(monitoring.CommandListener):
+    """pymongo command listener; pass it to MongoClient(event_listeners=...)."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMANDS.labels(event.command_name, "ok").inc()
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMANDS.labels(event.command_name, "error").inc()
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+
+def cache_collector(name: str, stats: Callable[[], Dict[str, int]]) -> Callable[[], None]:
+    """Collector that copies a cache's `*_stats()` dict into app_cache_stats."""
+    def collect() -> None:
+        for stat, value in stats().items():
+            CACHE_STATS.labels(name, stat).set(value)
+    collect.__name__ = f"{name}_cache"
+    return collect
+
+
+def update_queue_depth(col) -> None:
+    """Count queued and running jobs; both are prefixes of job_queue_idx.
+
+    Blocking; the API calls it through run_db when scraped.
+    """
+    for state in ("queued", "running"):
+        QUEUE_DEPTH.labels(state).set(col.count_documents({"job.state": state}))
+
+
+# -----------------------------
+# GRAPH NODES AND EXTERNAL APIS
+# -----------------------------
+
+def _on_node(name: str, seconds: float, failed: bool) -> None:
+    NODE_LATENCY.labels(name).observe(seconds)
+    if failed:
+        NODE_ERRORS.labels(name).inc()
+
+
+def _on_call(service: str, nbytes: int, ok: bool) -> None:
+    EXTERNAL_REQUESTS.labels(service, "ok" if ok else "error").inc()
+    if nbytes:
+        EXTERNAL_BYTES.labels(service).inc(nbytes)
+
+
+def collect_breakers() -> None:
+    from nodes.resilience import CLOSED, HALF_OPEN, OPEN, breaker_states
+
+    for service, current in breaker_states().items():
+        for state in (CLOSED, OPEN, HALF_OPEN):
+            BREAKER_STATE.labels(service, state).set(1 if state == current else 0)
+
+
+def install_graph_hooks() -> None:
+    """Feed node timings and external calls from nodes/tracing.py into metrics."""
+    from nodes.tracing import add_call_hook, add_node_hook
+
+    add_node_hook(_on_node)
+    add_call_hook(_on_call)
+
+
+# -----------------------------
+# WORKER ENDPOINT
+# -----------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the worker log
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `GET /metrics` from a daemon thread of this process."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
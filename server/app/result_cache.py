@@ -0,0 +1,38 @@
+"""Content-hash cache of verification graph results.
+
+Uploads are stored under their SHA-256 digest, so a re-uploaded CV maps to the
+same file and the same cache entry. Entries live in `CV_RESULTS_COLLECTION`:
+
+  { _id: '<sha256>', result: {...}, computed_at }
+
+Set `CV_RESULT_CACHE_TTL_SECONDS` to re-run the graph once an entry is older
+than that, so GitHub activity and search results get refreshed.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo.collection import Collection
+
+from app.config import CV_RESULT_CACHE_TTL_SECONDS
+
+
+def get_cached_result(
+    col: Collection,
+    sha256: str,
+    ttl_seconds: float = CV_RESULT_CACHE_TTL_SECONDS,
+) -> Optional[dict]:
+    """Return the cached graph result for `sha256`, or None if missing or expired."""
+    query = {"_id": sha256}
+    if ttl_seconds > 0:
+        query["computed_at"] = {"$gte": datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)}
+    entry = col.find_one(query, {"result": 1})
+    return entry.get("result") if entry else None
+
+
+def store_result(col: Collection, sha256: str, result: dict) -> None:
+    col.update_one(
+        {"_id": sha256},
+        {"$set": {"result": result, "computed_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
@@ -2,23 +2,26 @@
 
 Usage:
   python -m app.seed --username admin --password admin123
+  python -m app.seed --backfill-daily-stats
 
 Environment fallbacks:
   ADMIN_USERNAME, ADMIN_PASSWORD (if CLI args not provided)
 
 This creates an admin user if it doesn't exist, ensures helpful indexes,
-and prepares the CV upload directory.
+and prepares the CV upload directory. `--backfill-daily-stats` rebuilds the
+per-day dashboard counters (see app/daily_stats.py) from existing requests.
 """
 
 import argparse
 import os
 from typing import Optional
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING
 
 from app.db import db
 from app.utils import hash_password
-from app.config import ADMIN_COLLECTION, REQUESTS_COLLECTION, CV_FILES_DIR
+from app.config import ADMIN_COLLECTION, REQUESTS_COLLECTION, DAILY_STATS_COLLECTION, CV_FILES_DIR
+from app.daily_stats import backfill_daily_stats
 
 
 def ensure_upload_dir() -> None:
@@ -35,6 +38,16 @@ def ensure_indexes() -> None:
     requests.create_index([("status", ASCENDING)], name="status_idx")
     requests.create_index([("created_at", ASCENDING)], name="created_at_idx")
 
+    # Requests: keyset pagination of candidate listings (see app/pagination.py)
+    requests.create_index(
+        [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="status_created_id_idx",
+    )
+    requests.create_index([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_id_idx")
+
+    # Requests: job queue claims (see app/jobs.py)
+    requests.create_index([("job.state", ASCENDING), ("job.available_at", ASCENDING)], name="job_queue_idx")
+
 
 def seed_admin(username: str, password: str) -> dict:
     admins = db[ADMIN_COLLECTION]
@@ -53,9 +66,15 @@ def main(argv: Optional[list[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Seed admin user and DB indexes")
     parser.add_argument("--username", default=os.getenv("ADMIN_USERNAME"), help="Admin username")
     parser.add_argument("--password", default=os.getenv("ADMIN_PASSWORD"), help="Admin password")
+    parser.add_argument("--backfill-daily-stats", action="store_true", help="Rebuild per-day dashboard counters and exit")
 
     args = parser.parse_args(argv)
 
+    if args.backfill_daily_stats:
+        days = backfill_daily_stats(db[REQUESTS_COLLECTION], db[DAILY_STATS_COLLECTION])
+        print({"daily_stats": days})
+        return
+
     if not args.username or not args.password:
         raise SystemExit("Provide --username and --password or set ADMIN_USERNAME/ADMIN_PASSWORD env vars")
 
@@ -64,7 +83,8 @@ def main(argv: Optional[list[str]] = None) -> None:
     res = seed_admin(args.username, args.password)
     print({
         "upload_dir": CV_FILES_DIR,
-        "indexes": ["admins.uniq_username", "requests.status_idx", "requests.created_at_idx"],
+        "indexes": ["admins.uniq_username", "requests.status_idx", "requests.created_at_idx", "requests.job_queue_idx",
+                    "requests.status_created_id_idx", "requests.created_id_idx"],
         "admin": res,
     })
 
@@ -0,0 +1,61 @@
+"""Dashboard counters shared by the admin routers.
+
+All four card values come from one `$group` by status instead of four
+`count_documents` scans, and the result is kept in a short-lived per-process
+cache. Writes made by this process (submissions, status changes) invalidate
+it immediately; changes from other processes show up within
+`STATS_CACHE_TTL_SECONDS`.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from pymongo.collection import Collection
+
+from app.config import STATS_CACHE_TTL_SECONDS
+
+_cached: Optional[dict] = None
+_expires_at = 0.0
+# bumped on invalidation so an aggregation that started earlier is not cached
+_generation = 0
+_lock = threading.Lock()
+
+
+def _aggregate_stats(col: Collection) -> dict:
+    counts = {"approved": 0, "rejected": 0, "pending": 0}
+    total = 0
+    for row in col.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]):
+        total += row["n"]
+        status = row["_id"]
+        if status is None:
+            # missing or null status has not been reviewed yet
+            status = "pending"
+        if status in counts:
+            counts[status] += row["n"]
+    # the groups cover every document, so their sum is the exact total
+    return {"total_requests": total, **counts}
+
+
+def get_request_stats(col: Collection) -> dict:
+    """Return {total_requests, approved, rejected, pending}, cached briefly."""
+    global _cached, _expires_at
+    now = time.monotonic()
+    with _lock:
+        if _cached is not None and now < _expires_at:
+            return dict(_cached)
+        generation = _generation
+
+    stats = _aggregate_stats(col)
+    with _lock:
+        if generation == _generation:
+            _cached = stats
+            _expires_at = now + STATS_CACHE_TTL_SECONDS
+    return dict(stats)
+
+
+def invalidate_stats() -> None:
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
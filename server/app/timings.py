@@ -0,0 +1,57 @@
+"""Latency percentiles of the verification graph, per node.
+
+Workers store a `timings` sub-document on each request (see
+nodes/tracing.py). The admin endpoint summarises the most recent ones, newest
+`_id` first so the read walks the primary key index, and reports per-node
+p50/p95/p99 wall time, mean external calls and bytes, and error counts.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List
+
+from pymongo.collection import Collection
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    # nearest-rank on an already sorted list
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    values.sort()
+    return {
+        "p50_ms": _percentile(values, 0.50),
+        "p95_ms": _percentile(values, 0.95),
+        "p99_ms": _percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+def node_timing_stats(col: Collection, limit: int) -> dict:
+    totals: List[float] = []
+    nodes = defaultdict(lambda: {"ms": [], "calls": 0, "bytes": 0, "errors": 0})
+    for doc in col.find({"timings": {"$exists": True}}, {"timings": 1}).sort("_id", -1).limit(limit):
+        timings = doc.get("timings") or {}
+        totals.append(timings.get("total_ms", 0))
+        for name, entry in (timings.get("nodes") or {}).items():
+            acc = nodes[name]
+            acc["ms"].append(entry.get("ms", 0))
+            acc["calls"] += entry.get("calls", 0)
+            acc["bytes"] += entry.get("bytes", 0)
+            acc["errors"] += 1 if entry.get("error") else 0
+
+    out = {}
+    for name, acc in sorted(nodes.items()):
+        runs = len(acc["ms"])
+        out[name] = {
+            "runs": runs,
+            **_summary(acc["ms"]),
+            "avg_calls": round(acc["calls"] / runs, 2),
+            "avg_bytes": round(acc["bytes"] / runs),
+            "errors": acc["errors"],
+        }
+    return {"sample": len(totals), "total": _summary(totals), "nodes": out}
@@ -0,0 +1,141 @@
+"""Streaming CV uploads.
+
+An upload is checked before it costs anything: the request body is capped
+while it is still being received, and the file type is taken from the magic
+bytes of the first chunk rather than trusted from the extension. The file is
+then streamed to a temporary file in `CV_FILES_DIR`, hashed in the same pass,
+and renamed to `<sha256><ext>`. Disk writes and hashing run in worker
+threads, so a large upload never stalls the event loop.
+"""
+
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.config import CV_FILES_DIR, CV_MAX_UPLOAD_BYTES
+from nodes.word_text import ZIP_MAGIC, OLE_MAGIC
+
+CHUNK_SIZE = 1024 * 1024
+# Room for the multipart boundaries and the candidate's form fields
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Accepted extensions and the signature their content must start with
+MAGIC = {
+    ".pdf": b"%PDF",
+    ".docx": ZIP_MAGIC,
+    ".doc": OLE_MAGIC,
+}
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"CV exceeds the {CV_MAX_UPLOAD_BYTES // (1024 * 1024)}MB upload limit"
+    )
+
+
+class UploadLimitMiddleware:
+    """Reject oversized submissions before the multipart parser spools them.
+
+    A declared Content-Length over the limit is refused outright; bodies
+    without one are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app, path_suffix: str = "/cv/submit", max_body: int = CV_MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES):
+        self.app = app
+        self.path_suffix = path_suffix
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            return await self.app(scope, receive, send)
+
+        length = Headers(scope=scope).get("content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_body:
+            response = JSONResponse(status_code=413, content={"detail": _too_large().detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _write_chunk(buffer: BinaryIO, digest, chunk: bytes) -> None:
+    # hashlib releases the GIL on large buffers, so both halves run off-loop
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _move_into_place(tmp_path: str, file_path: str) -> None:
+    if os.path.exists(file_path):
+        # Same content is already stored; identical uploads share one file
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, file_path)
+
+
+async def save_upload(upload: UploadFile, ext: str) -> Tuple[str, str]:
+    """Stream `upload` into CV_FILES_DIR; return (stored file name, sha256)."""
+    if upload.size is not None and upload.size > CV_MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    first = await upload.read(CHUNK_SIZE)
+    if not first:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    if not first.startswith(MAGIC[ext]):
+        raise HTTPException(status_code=415, detail=f"File content is not a valid {ext} document")
+
+    tmp_path = os.path.join(CV_FILES_DIR, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        buffer = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            chunk = first
+            while chunk:
+                size += len(chunk)
+                if size > CV_MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+                chunk = await upload.read(CHUNK_SIZE)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except HTTPException:
+        await run_in_threadpool(_remove_quietly, tmp_path)
+        raise
+    except Exception:
+        await run_in_threadpool(_remove_quietly, tmp_path)
+        raise HTTPException(status_code=500, detail="Failed to write file to disk")
+
+    # Content-addressed storage: the rename is atomic, so readers never see
+    # a partially written CV under its final name
+    sha256 = digest.hexdigest()
+    stored_name = f"{sha256}{ext}"
+    try:
+        await run_in_threadpool(_move_into_place, tmp_path, os.path.join(CV_FILES_DIR, stored_name))
+    except Exception:
+        await run_in_threadpool(_remove_quietly, tmp_path)
+        raise HTTPException(status_code=500, detail="Failed to write file to disk")
+    return stored_name, sha256
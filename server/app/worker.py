@@ -0,0 +1,194 @@
+"""CV processing worker pool.
+
+Usage:
+  python -m app.worker --concurrency 4
+  python -m app.worker --concurrency 4 --metrics-port 9101
+  python -m app.worker --profile <request id>   # profile one CV and exit
+
+Environment fallbacks:
+  CV_WORKER_CONCURRENCY, CV_WORKER_POLL_SECONDS, CV_JOB_STALE_SECONDS,
+  CV_WORKER_METRICS_PORT
+
+Starts one process per concurrency slot. Each process claims queued jobs from
+the `requests` collection (see app/jobs.py) and runs the verification graph.
+The parent restarts crashed processes and re-queues jobs they left running.
+
+With `--metrics-port N`, worker process i serves Prometheus metrics (graph
+node latencies, external API calls, MongoDB commands, jobs processed) on
+port N + i; a restarted process takes over its predecessor's port.
+
+`--profile` runs the graph once for the given request under cProfile, in this
+process and without touching the job, then prints the node timings and the
+top functions and writes the stats to `--profile-out` for snakeviz/pstats.
+PDF text extraction runs in its own process pool, so it shows up there as
+time spent waiting on the pool.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+from typing import Optional
+
+from app.config import (
+    REQUESTS_COLLECTION,
+    CV_RESULTS_COLLECTION,
+    CV_EVIDENCE_COLLECTION,
+    CV_STORE_EVIDENCE,
+    CV_WORKER_CONCURRENCY,
+    CV_WORKER_POLL_SECONDS,
+    CV_JOB_STALE_SECONDS,
+    CV_WORKER_METRICS_PORT,
+)
+from app.jobs import claim_job, fail_job, process_job, requeue_stale_jobs
+
+
+def handle_job(col, doc: dict, run, cache_col=None, evidence_col=None, worker_id: str = "") -> Optional[str]:
+    """`process_job`, but an error while recording the outcome fails the job
+    (with backoff) instead of killing the worker process.
+
+    Returns the new job state, or None when even that could not be recorded;
+    the job is then recovered as stale.
+    """
+    try:
+        return process_job(col, doc, run, cache_col, evidence_col)
+    except Exception as e:
+        print(f"[worker {worker_id}] job {doc['_id']} crashed: {type(e).__name__}: {e}")
+        try:
+            return fail_job(col, doc, f"{type(e).__name__}: {e}")
+        except Exception as e:
+            print(f"[worker {worker_id}] could not record failure of job {doc['_id']}: {e}")
+            return None
+
+
+def _worker_loop(poll_seconds: float, metrics_port: int = 0) -> None:
+    # Imported here so each spawned process opens its own Mongo connection
+    import app.db as db_module
+    from app.metrics import (
+        JOBS_PROCESSED,
+        add_collector,
+        cache_collector,
+        collect_breakers,
+        install_graph_hooks,
+        serve_metrics,
+    )
+    from nodes.company_purpose import cache_stats as purpose_cache_stats
+    from nodes.graph_builder import get_cv_graph, run_cv_graph
+    from nodes.tavily_search import search_stats as tavily_search_stats
+
+    install_graph_hooks()
+    add_collector(cache_collector("company_purpose", purpose_cache_stats))
+    add_collector(cache_collector("tavily", tavily_search_stats))
+    add_collector(collect_breakers)
+    if metrics_port:
+        serve_metrics(metrics_port)
+
+    # Compile the graph before claiming so the first job does not pay for it
+    get_cv_graph()
+    col = db_module.db[REQUESTS_COLLECTION]
+    cache_col = db_module.db[CV_RESULTS_COLLECTION]
+    evidence_col = db_module.db[CV_EVIDENCE_COLLECTION] if CV_STORE_EVIDENCE else None
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            doc = claim_job(col, worker_id)
+        except Exception as e:
+            print(f"[worker {worker_id}] claim failed: {e}")
+            doc = None
+        if doc is None:
+            time.sleep(poll_seconds)
+            continue
+        state = handle_job(col, doc, run_cv_graph, cache_col, evidence_col, worker_id)
+        if state is None:
+            continue
+        JOBS_PROCESSED.labels(state).inc()
+        print(f"[worker {worker_id}] job {doc['_id']} -> {state}")
+
+
+def profile_request(request_id: str, out_path: str) -> None:
+    import cProfile
+    import pstats
+
+    from bson import ObjectId
+
+    import app.db as db_module
+    from app.jobs import cv_abs_path
+    from nodes.graph_builder import get_cv_graph, run_cv_graph
+    from nodes.tracing import profile_nodes
+
+    doc = db_module.db[REQUESTS_COLLECTION].find_one({"_id": ObjectId(request_id)}, {"cv_path": 1})
+    if not doc or "cv_path" not in doc:
+        raise SystemExit(f"Request {request_id} not found or has no CV")
+    # Graph compilation is a one-off cost per process, keep it out of the profile
+    get_cv_graph()
+
+    profiler = cProfile.Profile()
+    with profile_nodes() as node_profiles:
+        result = profiler.runcall(run_cv_graph, cv_abs_path(doc))
+    # Nodes run on the graph's worker threads, each with its own profiler
+    stats = pstats.Stats(profiler)
+    for node_profiler in node_profiles:
+        stats.add(node_profiler)
+    stats.dump_stats(out_path)
+    print({"timings": result.get("timings"), "risk": result.get("risk"), "profile": out_path})
+    stats.sort_stats("cumulative").print_stats(25)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the CV processing worker pool")
+    parser.add_argument("--concurrency", type=int, default=CV_WORKER_CONCURRENCY, help="Worker processes")
+    parser.add_argument("--poll", type=float, default=CV_WORKER_POLL_SECONDS, help="Idle poll interval (seconds)")
+    parser.add_argument("--stale-after", type=float, default=CV_JOB_STALE_SECONDS, help="Re-queue running jobs older than this (seconds)")
+    parser.add_argument("--metrics-port", type=int, default=CV_WORKER_METRICS_PORT, help="First port for per-process /metrics (0 disables)")
+    parser.add_argument("--profile", metavar="REQUEST_ID", help="Profile the graph for one request and exit")
+    parser.add_argument("--profile-out", default="cv_graph.prof", help="Where --profile writes its cProfile stats")
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        profile_request(args.profile, args.profile_out)
+        return
+    if args.concurrency < 1:
+        raise SystemExit("--concurrency must be at least 1")
+
+    import app.db as db_module
+
+    col = db_module.db[REQUESTS_COLLECTION]
+    ctx = multiprocessing.get_context("spawn")
+
+    def start(slot: int) -> multiprocessing.Process:
+        metrics_port = args.metrics_port + slot if args.metrics_port else 0
+        # Not daemonic: workers start their own PDF extraction processes
+        proc = ctx.Process(target=_worker_loop, args=(args.poll, metrics_port))
+        proc.start()
+        return proc
+
+    procs = [start(slot) for slot in range(args.concurrency)]
+    print({"workers": args.concurrency, "pids": [p.pid for p in procs]})
+
+    try:
+        while True:
+            try:
+                requeued = requeue_stale_jobs(col, args.stale_after)
+                if requeued:
+                    print(f"[worker] re-queued {requeued} stale job(s)")
+            except Exception as e:
+                print(f"[worker] stale job recovery failed: {e}")
+
+            for i, proc in enumerate(procs):
+                if not proc.is_alive():
+                    print(f"[worker] process {proc.pid} exited ({proc.exitcode}); restarting")
+                    procs[i] = start(i)
+
+            time.sleep(max(args.poll, 5))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,301 @@
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import hashlib
 import os
 import json
 import re
-import google.genai as genai
+import sqlite3
+import threading
+import time
 
-# Try to configure the genai client in a backwards-compatible way.
-# New `google.genai` may not expose `configure`, so handle gracefully.
+import httpx
+
+from nodes.resilience import ServiceUnavailable, breaker, call_timeout
+from nodes.tracing import record_call
+
+# The genai SDK takes about half a second to import, so the client is set up
+# on the first call that needs it rather than when the graph is imported.
 client = None
 model = None
 API_KEY = os.getenv("GEMINI_API_KEY")
-try:
-    if hasattr(genai, "configure"):
-        genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-    elif hasattr(genai, "Client"):
+_model_ready = False
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Return the configured Gemini model, or None to fall back to the heuristic."""
+    global client, model, _model_ready
+    if _model_ready:
+        return model
+    with _model_lock:
+        if _model_ready:
+            return model
+        # Try to configure the genai client in a backwards-compatible way.
+        # New `google.genai` may not expose `configure`, so handle gracefully.
         try:
-            client = genai.Client(api_key=API_KEY)
-            # attempt to get a model object if client supports it
-            if hasattr(client, "get_model"):
-                model = client.get_model("gemini-2.5-flash")
+            import google.genai as genai
+
+            if hasattr(genai, "configure"):
+                genai.configure(api_key=API_KEY)
+                model = genai.GenerativeModel("gemini-2.5-flash")
+            elif hasattr(genai, "Client"):
+                try:
+                    client = genai.Client(api_key=API_KEY)
+                    # attempt to get a model object if client supports it
+                    if hasattr(client, "get_model"):
+                        model = client.get_model("gemini-2.5-flash")
+                    else:
+                        # leave model None; we'll fallback to heuristic
+                        model = None
+                except Exception:
+                    client = None
+                    model = None
             else:
-                # leave model None; we'll fallback to heuristic
                 model = None
         except Exception:
             client = None
             model = None
-    else:
-        model = None
-except Exception:
-    client = None
-    model = None
+        _model_ready = True
+    return model
 
-def purpose_matches(mentioned_text: str, expected_keywords: str) -> Tuple[bool, Dict]:
-    """
-    Use Gemini LLM to semantically evaluate whether
-    the mentioned company purpose matches expected keywords.
+# -----------------------------
+# RESULT CACHE
+# -----------------------------
+
+# The same company descriptions recur across candidates, so LLM verdicts are
+# cached by the normalized (description, expected_keywords) pair. Entries live
+# in an in-process LRU and, when PURPOSE_CACHE_PATH is set, in a SQLite file
+# that survives restarts and is shared by worker processes.
+CACHE_PATH = os.getenv("PURPOSE_CACHE_PATH")
+CACHE_TTL_SECONDS = float(os.getenv("PURPOSE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("PURPOSE_CACHE_MAX_ENTRIES", "10000"))
+# Roles scored per LLM prompt
+BATCH_SIZE = int(os.getenv("PURPOSE_BATCH_SIZE", "20"))
+# The SDK call has no timeout of its own, so it runs on this pool and is
+# abandoned (left to finish in the background) when it takes longer
+LLM_TIMEOUT_SECONDS = float(os.getenv("PURPOSE_LLM_TIMEOUT_SECONDS", "30"))
+_llm_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+
+_stats = {"cache_hits": 0, "cache_misses": 0, "llm_calls": 0, "tokens_saved": 0}
+_stats_lock = threading.Lock()
+
+
+def _bump(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def cache_stats() -> Dict[str, int]:
+    """Counters for cache hits/misses, LLM round trips and tokens not re-spent."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _cache_key(mentioned_text: str, expected_keywords: str) -> str:
+    raw = _normalize(mentioned_text) + "\x00" + _normalize(expected_keywords)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PurposeCache:
+    """LRU + TTL cache of LLM verdicts, optionally backed by SQLite.
+
+    The SQLite file is shared by worker processes, so it may be locked by
+    another writer. A failed read is a miss and a failed write keeps only
+    the in-memory entry; neither fails the CV. Expired and surplus rows are
+    pruned when the file is opened and every `PRUNE_EVERY` writes.
     """
 
-    if not mentioned_text or not expected_keywords:
-        return False, {"score": 0, "reason": "Missing input"}
+    PRUNE_EVERY = 100
 
-    prompt = f"""
-You are a CV fraud detection assistant.
+    def __init__(self, path: Optional[str] = None, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._mem: "OrderedDict[str, Tuple[float, Dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS purpose_cache ("
+                    "key TEXT PRIMARY KEY, result TEXT NOT NULL, tokens INTEGER NOT NULL, stored_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS purpose_cache_stored_at ON purpose_cache (stored_at)")
+                self._prune(time.time())
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[purpose] cache file {path} unusable, caching in memory only: {e}")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Tuple[Dict, int]]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT stored_at, result, tokens FROM purpose_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"[purpose] cache read failed: {e}")
+                    row = None
+                if row:
+                    entry = (row[0], json.loads(row[1]), row[2])
+                    self._mem[key] = entry
+            if entry is None:
+                return None
+            if now - entry[0] > self.ttl:
+                self._mem.pop(key, None)
+                return None
+            self._mem.move_to_end(key)
+            self._trim()
+            return entry[1], entry[2]
 
-Compare the following:
+    def put(self, key: str, result: Dict, tokens: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._mem[key] = (now, result, tokens)
+            self._mem.move_to_end(key)
+            self._trim()
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO purpose_cache (key, result, tokens, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result), tokens, now),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[purpose] cache write failed, kept in memory only: {e}")
+                try:
+                    self._db.rollback()
+                except sqlite3.Error:
+                    pass
 
-Company description from CV:
-"{mentioned_text}"
+    def _prune(self, now: float) -> None:
+        # Both deletes walk the stored_at index instead of scanning the table
+        self._db.execute("DELETE FROM purpose_cache WHERE stored_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM purpose_cache WHERE stored_at < "
+            "(SELECT stored_at FROM purpose_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,),
+        )
+
+    def _trim(self) -> None:
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+
+cache = PurposeCache(CACHE_PATH)
+
+
+# -----------------------------
+# EVALUATION
+# -----------------------------
+
+def _batch_prompt(pairs: List[Tuple[str, str]]) -> str:
+    items = "\n".join(
+        json.dumps({"index": i, "description": desc, "expected_keywords": kws})
+        for i, (desc, kws) in enumerate(pairs)
+    )
+    return f"""
+You are a CV fraud detection assistant.
 
-Expected company purpose keywords:
-"{expected_keywords}"
+For each item below, compare the company description from a CV with the
+expected company purpose keywords and determine whether the description
+aligns with the expected purpose.
 
-Determine whether the description aligns with the expected purpose.
+Items (one JSON object per line):
+{items}
 
-Return JSON ONLY in this format:
-{{
-  "match": true or false,
-  "score": 0-1,
-  "reason": "short explanation"
-}}
+Return JSON ONLY: an array with one object per item, in this format:
+[
+  {{"index": 0, "match": true or false, "score": 0-1, "reason": "short explanation"}}
+]
 """
 
-    # If a usable model is available, try LLM path
-    if model is not None and hasattr(model, "generate_content"):
-        try:
-            response = model.generate_content(prompt)
-            text = response.text.strip()
 
-            # Extract JSON safely
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            json_text = text[start:end]
+def _response_tokens(response, prompt: str) -> int:
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None) if usage is not None else None
+    if isinstance(total, int) and total > 0:
+        return total
+    # Rough estimate when the SDK reports no usage (~4 characters per token)
+    return (len(prompt) + len(getattr(response, "text", "") or "")) // 4
+
+
+def _is_outage(error: Exception) -> bool:
+    """Whether `error` means Gemini is down: a timeout, a connection error or a 5xx."""
+    if isinstance(error, (FutureTimeout, ConnectionError)):
+        return True
+    # google.genai and google.api_core errors carry the HTTP status as `code`
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code >= 500
+    # google.genai talks to the API through httpx
+    return isinstance(error, httpx.TransportError)
+
 
-            result = json.loads(json_text)
+def _llm_batch(pairs: List[Tuple[str, str]], llm, deadline: Optional[float] = None) -> List[Optional[Tuple[Dict, int]]]:
+    """Score `pairs` in one round trip; None for items the model did not answer.
 
-            return result.get("match", False), result
-        except Exception as e:
-            # fall through to heuristic
-            pass
+    Raises ServiceUnavailable when Gemini cannot be asked (breaker open,
+    deadline spent) or does not answer in time.
+    """
+    gemini = breaker("gemini")
+    # A spent deadline is this CV's problem, not Gemini's: raise before the
+    # paid request goes out and without counting it against the breaker
+    timeout = call_timeout(LLM_TIMEOUT_SECONDS, deadline)
+    gemini.check()
+    prompt = _batch_prompt(pairs)
+    future = _llm_pool.submit(llm.generate_content, prompt)
+    try:
+        response = future.result(timeout=timeout)
+        _bump("llm_calls")
+        text = response.text.strip()
+    except Exception as e:
+        future.cancel()
+        if _is_outage(e):
+            gemini.record_failure()
+        else:
+            # Gemini answered (4xx, auth, quota, blocked response); it is up
+            gemini.record_success()
+        record_call("gemini", len(prompt), ok=False)
+        if isinstance(e, FutureTimeout):
+            raise ServiceUnavailable("gemini timed out") from e
+        raise ServiceUnavailable(f"gemini: {type(e).__name__}: {e}"[:200]) from e
+    gemini.record_success()
+    record_call("gemini", len(prompt) + len(text))
 
+    try:
+        # Extract JSON safely
+        start = text.find("[")
+        end = text.rfind("]") + 1
+        items = json.loads(text[start:end])
+    except Exception:
+        return [None] * len(pairs)
+
+    per_item = max(_response_tokens(response, prompt) // len(pairs), 1)
+    results: List[Optional[Tuple[Dict, int]]] = [None] * len(pairs)
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        idx = item.pop("index", None)
+        if isinstance(idx, int) and 0 <= idx < len(pairs):
+            results[idx] = (item, per_item)
+    return results
+
+
+def _heuristic(mentioned_text: str, expected_keywords: str) -> Tuple[bool, Dict]:
     # Fallback heuristic: simple keyword overlap scoring
     try:
         kws = [k.strip().lower() for k in re.split(r"[,;\n]", expected_keywords) if k.strip()]
@@ -91,3 +308,77 @@ Return JSON ONLY in this format:
         return match, {"score": round(score, 2), "matched_keywords": matched, "expected_count": len(kws), "reason": "heuristic fallback"}
     except Exception as e:
         return False, {"score": 0, "reason": f"heuristic error: {str(e)}"}
+
+
+def purposes_match(pairs: List[Tuple[str, str]], llm=None, deadline: Optional[float] = None) -> List[Tuple[bool, Dict]]:
+    """
+    Evaluate many (mentioned_text, expected_keywords) pairs at once.
+
+    Cached verdicts are reused; the rest are sent to Gemini in batches of
+    `BATCH_SIZE` per prompt. Pairs from several CVs can be mixed freely.
+    `llm` defaults to the configured Gemini model; any object with a
+    `generate_content(prompt)` method returning `.text` works.
+
+    When Gemini is unavailable (see nodes/resilience.py) the heuristic
+    answers instead and its details carry a `degraded` reason.
+    """
+    if llm is None:
+        llm = get_model()
+    use_llm = llm is not None and hasattr(llm, "generate_content")
+
+    out: List[Optional[Tuple[bool, Dict]]] = [None] * len(pairs)
+    pending: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    for i, (mentioned_text, expected_keywords) in enumerate(pairs):
+        if not mentioned_text or not expected_keywords:
+            out[i] = (False, {"score": 0, "reason": "Missing input"})
+            continue
+        if not use_llm:
+            out[i] = _heuristic(mentioned_text, expected_keywords)
+            continue
+        key = _cache_key(mentioned_text, expected_keywords)
+        hit = cache.get(key)
+        if hit is not None:
+            result, tokens = hit
+            _bump("cache_hits")
+            _bump("tokens_saved", tokens)
+            out[i] = (result.get("match", False), result)
+            continue
+        if key in pending:
+            # Identical pair earlier in this call: answer both from one LLM item
+            pending[key].append(i)
+            continue
+        _bump("cache_misses")
+        pending[key] = [i]
+
+    keys = list(pending)
+    for b in range(0, len(keys), BATCH_SIZE):
+        batch_keys = keys[b:b + BATCH_SIZE]
+        batch_pairs = [pairs[pending[k][0]] for k in batch_keys]
+        unavailable = None
+        try:
+            answers = _llm_batch(batch_pairs, llm, deadline)
+        except ServiceUnavailable as e:
+            unavailable = str(e)
+            answers = [None] * len(batch_pairs)
+        for key, pair, answer in zip(batch_keys, batch_pairs, answers):
+            if answer is None:
+                verdict = _heuristic(*pair)
+                if unavailable:
+                    verdict[1]["degraded"] = unavailable
+            else:
+                result, tokens = answer
+                cache.put(key, result, tokens)
+                verdict = (result.get("match", False), result)
+            for idx in pending[key]:
+                out[idx] = verdict
+
+    return out
+
+
+def purpose_matches(mentioned_text: str, expected_keywords: str, llm=None) -> Tuple[bool, Dict]:
+    """
+    Use Gemini LLM to semantically evaluate whether
+    the mentioned company purpose matches expected keywords.
+    """
+    return purposes_match([(mentioned_text, expected_keywords)], llm)[0]
@@ -1,15 +1,183 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+import contextvars
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+
+from nodes.resilience import breaker, call_timeout, remaining
+from nodes.tracing import record_call
+
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+PER_PAGE = 100
+
+# Pages after the first are fetched concurrently on this many threads
+PAGE_WORKERS = int(os.getenv("GITHUB_PAGE_WORKERS", "4"))
+# Longest we are willing to sleep for a rate-limit reset before giving up
+MAX_RATE_LIMIT_WAIT = float(os.getenv("GITHUB_MAX_RATE_LIMIT_WAIT", "60"))
+ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "1024"))
+REQUEST_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT_SECONDS", "15"))
+
+
+# -----------------------------
+# SHARED HTTP CLIENT
+# -----------------------------
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_page_pool = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="github-page")
+
+# (url, sorted params) -> (etag, the page's commits as _to_commit keeps
+# them, last page number); raw pages are ~10x larger
+_etag_cache: "OrderedDict[Tuple, Tuple[str, List[Dict], Optional[int]]]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Return the process-wide session so connections to GitHub are reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(PAGE_WORKERS * 4, 10))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _last_page(resp: requests.Response) -> Optional[int]:
+    last = resp.links.get("last", {}).get("url")
+    if not last:
+        return None
+    try:
+        return int(parse_qs(urlparse(last).query)["page"][0])
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def _is_rate_limited(resp: requests.Response) -> bool:
+    """A 429, or a 403 that carries rate-limit headers; a bare 403 is access denied."""
+    if resp.status_code == 429:
+        return True
+    return resp.status_code == 403 and (
+        resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers
+    )
+
+
+def _rate_limit_wait(resp: requests.Response) -> Optional[float]:
+    """Seconds to wait before retrying, or None if this is not a rate-limit response."""
+    if resp.status_code not in (403, 429):
+        return None
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    if resp.headers.get("X-RateLimit-Remaining") == "0":
+        reset = resp.headers.get("X-RateLimit-Reset")
+        try:
+            return max(float(reset) - time.time(), 0) + 1
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _get_page(url: str, params: Dict, headers: Dict, deadline: Optional[float] = None) -> Tuple[List[Dict], Optional[int]]:
+    """GET one page of commits, using ETag revalidation and backing off on rate limits.
+
+    Raises ServiceUnavailable when the GitHub breaker is open or `deadline`
+    has passed.
+    """
+    key = (url, tuple(sorted(params.items())))
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+        if cached is not None:
+            _etag_cache.move_to_end(key)
+
+    req_headers = dict(headers)
+    if cached is not None:
+        # 304 responses do not count against the GitHub rate limit
+        req_headers["If-None-Match"] = cached[0]
+
+    session = _get_session()
+    github = breaker("github")
+    wait_until = time.monotonic() + MAX_RATE_LIMIT_WAIT
+    while True:
+        github.check()
+        try:
+            resp = session.get(url, headers=req_headers, params=params, timeout=call_timeout(REQUEST_TIMEOUT, deadline))
+        except requests.RequestException:
+            github.record_failure()
+            record_call("github", ok=False)
+            raise
+        if resp.status_code >= 500:
+            github.record_failure()
+        else:
+            github.record_success()
+        record_call("github", len(resp.content), resp.status_code < 400)
+        wait = _rate_limit_wait(resp)
+        if wait is None:
+            break
+        left = remaining(deadline)
+        if time.monotonic() + wait > wait_until or (left is not None and wait > left):
+            resp.raise_for_status()
+        time.sleep(wait)
+
+    if resp.status_code == 304 and cached is not None:
+        return cached[1], cached[2]
+
+    resp.raise_for_status()
+    data = [_to_commit(c) for c in resp.json()]
+    last = _last_page(resp)
+
+    etag = resp.headers.get("ETag")
+    if etag:
+        with _etag_lock:
+            _etag_cache[key] = (etag, data, last)
+            _etag_cache.move_to_end(key)
+            while len(_etag_cache) > ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+    return data, last
+
+
+def _to_commit(c: Dict) -> Dict:
+    commit = c.get("commit", {})
+    author = commit.get("author", {})
+    return {
+        "sha": c.get("sha"),
+        "author": author.get("name") or (c.get("author") or {}).get("login"),
+        "date": author.get("date"),
+        "message": commit.get("message"),
+        "url": c.get("html_url"),
+    }
 
 
 def get_commits_between(
     repo_full_name: str,
     since: str,
-    until: str,
-    token: Optional[str] = None
+    until: Optional[str] = None,
+    token: Optional[str] = None,
+    deadline: Optional[float] = None,
 ) -> Dict:
-    """Return commits + activity score for a repo within date range."""
+    """Return commits + activity score for a repo within date range.
+
+    `until=None` means "up to now". The request then leaves `until` out, so
+    re-checking a repo sends the same URL and can be answered with a 304.
+
+    When GitHub is unavailable (breaker open, deadline spent, timeouts or
+    5xx), the result is partial and carries a `degraded` reason.
+    """
 
     if token is None:
         token = os.getenv("GITHUB_TOKEN")
@@ -18,66 +186,90 @@ def get_commits_between(
     if token:
         headers["Authorization"] = f"token {token}"
 
-    url = f"https://api.github.com/repos/{repo_full_name.strip()}/commits"
-    params = {"since": since, "until": until, "per_page": 100}
+    url = f"{GITHUB_API_URL}/repos/{repo_full_name.strip()}/commits"
+    params = {"since": since, "per_page": PER_PAGE}
+    if until is not None:
+        params["until"] = until
 
     commits: List[Dict] = []
-    session = requests.Session()
 
     try:
-        page = 1
-        while True:
-            params["page"] = page
-            resp = session.get(url, headers=headers, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-
-            if not data:
-                break
-
-            for c in data:
-                commit = c.get("commit", {})
-                author = commit.get("author", {})
+        data, last = _get_page(url, {**params, "page": 1}, headers, deadline)
+        commits.extend(data)
 
-                commits.append(
-                    {
-                        "sha": c.get("sha"),
-                        "author": author.get("name") or c.get("author", {}).get("login"),
-                        "date": author.get("date"),
-                        "message": commit.get("message"),
-                        "url": c.get("html_url"),
-                    }
-                )
+        if last and last > 1:
+            # The Link header tells us how many pages there are, fetch the rest at once
+            futures = [
+                # each page runs in the caller's context so it counts towards its node
+                _page_pool.submit(contextvars.copy_context().run, _get_page, url, {**params, "page": page}, headers, deadline)
+                for page in range(2, last + 1)
+            ]
+            for fut in futures:
+                page_data, _ = fut.result()
+                commits.extend(page_data)
+        elif len(data) >= PER_PAGE:
+            # No Link header: fall back to walking pages until a short one
+            page = 2
+            while True:
+                page_data, _ = _get_page(url, {**params, "page": page}, headers, deadline)
+                commits.extend(page_data)
+                if len(page_data) < PER_PAGE:
+                    break
+                page += 1
 
-            if len(data) < params["per_page"]:
-                break
-
-            page += 1
-
-    except Exception:
-        return {
+    except Exception as e:
+        failed = {
             "commits": commits,
             "commit_count": len(commits),
             "score": 0,
             "error": "Failed to fetch commits"
         }
+        # A 4xx (say, a repo that does not exist or is private) is an answer
+        # about the CV; anything else, rate limits included, means GitHub
+        # could not be asked
+        resp = getattr(e, "response", None)
+        status = getattr(resp, "status_code", None)
+        if status is None or status >= 500 or _is_rate_limited(resp):
+            failed["degraded"] = f"{type(e).__name__}: {e}"[:200]
+        return failed
 
-    # ----------------------
-    # SCORING LOGIC
-    # ----------------------
     commit_count = len(commits)
+    return {
+        "commits": commits,
+        "commit_count": commit_count,
+        "score": activity_score(commit_count)
+    }
 
+
+# ----------------------
+# SCORING LOGIC
+# ----------------------
+
+def activity_score(commit_count: int) -> float:
     if commit_count == 0:
-        score = 0
+        return 0
     elif commit_count <= 5:
-        score = 0.3
+        return 0.3
     elif commit_count <= 20:
-        score = 0.6
-    else:
-        score = 1.0
+        return 0.6
+    return 1.0
 
-    return {
-        "commits": commits,
-        "commit_count": commit_count,
-        "score": score
-    }
+
+def commit_timestamps(commits: List[Dict]) -> array:
+    """Sorted epoch seconds of the commits' author dates, for window counting."""
+    stamps = []
+    for c in commits:
+        date = c.get("date")
+        if not date:
+            continue
+        try:
+            stamps.append(datetime.fromisoformat(date.replace("Z", "+00:00")).timestamp())
+        except ValueError:
+            continue
+    stamps.sort()
+    return array("d", stamps)
+
+
+def count_between(timestamps: Sequence[float], since: float, until: float) -> int:
+    """Number of timestamps in [since, until]; `timestamps` must be sorted."""
+    return bisect_right(timestamps, until) - bisect_left(timestamps, since)
@@ -1,14 +1,23 @@
-from typing import TypedDict, Dict, Any, List
+from typing import Annotated, TypedDict, Dict, Any, List, Optional, Tuple
+import operator
+import threading
 from langgraph.graph import StateGraph, END
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Import your existing nodes
-from nodes.resume_parser import node_resume_parser
+from nodes.resume_parser import extract_text, parse_text
 from nodes.tavily_search import search_tavily
-from nodes.github_commits import get_commits_between
-from nodes.overlapping_roles import detect_full_time_overlaps
-from nodes.location_check import detect_conflicting_locations
-from nodes.company_purpose import purpose_matches
+from nodes.github_commits import (
+    get_commits_between,
+    commit_timestamps,
+    count_between,
+    activity_score,
+)
+from nodes.overlapping_roles import full_time_overlap_indices
+from nodes.location_check import conflicting_location_indices
+from nodes.company_purpose import purposes_match
+from nodes.resilience import new_deadline
+from nodes.tracing import run_trace, traced
 
 
 # -----------------------------
@@ -17,11 +26,17 @@ from nodes.company_purpose import purpose_matches
 
 class CVState(TypedDict, total=False):
     file_path: str
+    # Epoch seconds by which the external checks must be done (nodes/resilience.py)
+    deadline: Optional[float]
+    # {"service", "reason"} for every check that ran without its service;
+    # the checks write it in the same step, so entries are concatenated
+    degraded: Annotated[List[Dict[str, str]], operator.add]
     parsed_cv: Dict[str, Any]
     tavily_results: List[Dict]
     github_commits: Dict[str, Any]
-    overlaps: List
-    location_conflicts: List
+    # Checks refer to roles by their index in parsed_cv["roles"]
+    overlaps: List[Tuple[int, int]]
+    location_conflicts: List[Tuple[int, int]]
     company_checks: List[Dict]
     risk: Dict
 
@@ -30,10 +45,30 @@ class CVState(TypedDict, total=False):
 # NODES
 # -----------------------------
 
+# Every node returns only the keys it owns. The checks after the parser run
+# in the same step, so writing back the whole state would make them collide.
+
 def resume_parser_node(state: CVState) -> CVState:
-    parsed = node_resume_parser(state["file_path"])
-    state["parsed_cv"] = parsed
-    return state
+    text = extract_text(state["file_path"])
+    if not text.strip():
+        # Nothing to verify: flag for a human instead of scoring an empty CV
+        return {
+            "parsed_cv": parse_text(""),
+            "risk": {
+                "risk_score": None,
+                "decision": "Manual Review",
+                "total_commits": 0,
+                "reason": "No text could be extracted from the CV",
+            },
+        }
+    return {"parsed_cv": parse_text(text)}
+
+
+def route_after_parser(state: CVState) -> List[str]:
+    # The parser only sets `risk` itself when there is nothing to check
+    if "risk" in state:
+        return [END]
+    return list(CHECK_NODES)
 
 
 def tavily_node(state: CVState) -> CVState:
@@ -41,8 +76,11 @@ def tavily_node(state: CVState) -> CVState:
     roles = cv.get("roles", [])
     first_title = roles[0]["title"] if roles else ""
     query = f"{cv.get('name', '')} {first_title}"
-    state["tavily_results"] = search_tavily(query)
-    return state
+    results = search_tavily(query, deadline=state.get("deadline"))
+    update: CVState = {"tavily_results": results}
+    if results and results[0].get("degraded"):
+        update["degraded"] = [{"service": "tavily", "reason": results[0]["degraded"]}]
+    return update
 
 
 def github_node(state: CVState) -> CVState:
@@ -50,58 +88,83 @@ def github_node(state: CVState) -> CVState:
     repos = cv.get("github_repos", [])
     results = {}
 
-    for role in cv.get("roles", []):
+    # Every role is checked from its start date until now, so one fetch per
+    # repo from the earliest start covers all roles; each role's count is then
+    # sliced out of the sorted commit timestamps.
+    role_starts = []
+    for i, role in enumerate(cv.get("roles", [])):
         since = role.get("start")
-        until = role.get("end")
 
         if not since:
             continue
 
-        # Convert to ISO format
         try:
-            since_iso = datetime.strptime(since, "%Y-%m-%d").isoformat() + "Z"
-        except:
+            start = datetime.strptime(since, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        except ValueError:
             continue
-
-        until_iso = datetime.utcnow().isoformat() + "Z"
-
-        for repo in repos:
-            commits = get_commits_between(repo, since_iso, until_iso)
-            results[repo] = commits
-
-    state["github_commits"] = results
-    return state
+        role_starts.append((i, start))
+
+    if not role_starts:
+        return {"github_commits": results}
+
+    now = datetime.now(timezone.utc)
+    since_iso = min(start for _, start in role_starts).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    degraded = []
+    for repo in repos:
+        # No `until`: "now" changes every second and would defeat the ETag cache
+        commits = get_commits_between(repo, since_iso, deadline=state.get("deadline"))
+        if commits.get("degraded"):
+            degraded.append({"service": "github", "reason": f"{repo}: {commits['degraded']}"})
+        timestamps = commit_timestamps(commits.get("commits", []))
+        by_role = []
+        for i, start in role_starts:
+            count = count_between(timestamps, start.timestamp(), now.timestamp())
+            by_role.append({
+                "role": i,
+                "commit_count": count,
+                "score": activity_score(count),
+            })
+        commits["by_role"] = by_role
+        results[repo] = commits
+
+    if degraded:
+        return {"github_commits": results, "degraded": degraded}
+    return {"github_commits": results}
 
 
 def overlap_node(state: CVState) -> CVState:
     roles = state["parsed_cv"].get("roles", [])
-    state["overlaps"] = detect_full_time_overlaps(roles)
-    return state
+    return {"overlaps": full_time_overlap_indices(roles)}
 
 
 def location_node(state: CVState) -> CVState:
     roles = state["parsed_cv"].get("roles", [])
-    state["location_conflicts"] = detect_conflicting_locations(roles)
-    return state
+    return {"location_conflicts": conflicting_location_indices(roles)}
 
 
 def company_node(state: CVState) -> CVState:
     roles = state["parsed_cv"].get("roles", [])
-    checks = []
 
-    for role in roles:
-        match, details = purpose_matches(
-            role.get("description", ""),
-            role.get("expected_keywords", "")
-        )
+    # One batched (and cached) evaluation for every role of the CV
+    verdicts = purposes_match([
+        (role.get("description", ""), role.get("expected_keywords", ""))
+        for role in roles
+    ], deadline=state.get("deadline"))
+
+    checks = []
+    degraded = None
+    for i, (match, details) in enumerate(verdicts):
         checks.append({
-            "role": role.get("title"),
+            "role": i,
             "match": match,
             "details": details
         })
+        degraded = degraded or details.get("degraded")
 
-    state["company_checks"] = checks
-    return state
+    if degraded:
+        return {"company_checks": checks, "degraded": [{"service": "gemini", "reason": degraded}]}
+    return {"company_checks": checks}
 
 
 def risk_node(state: CVState) -> CVState:
@@ -109,6 +172,7 @@ def risk_node(state: CVState) -> CVState:
     locations = state.get("location_conflicts", [])
     company_checks = state.get("company_checks", [])
     github_data = state.get("github_commits", {})
+    degraded_services = sorted({d["service"] for d in state.get("degraded", [])})
 
     score = 0
 
@@ -122,8 +186,9 @@ def risk_node(state: CVState) -> CVState:
     score += sum(0.2 for c in company_checks if not c["match"])
 
     # GitHub scoring
-    total_commits = sum(len(v) for v in github_data.values())
-    if total_commits == 0:
+    total_commits = sum(v.get("commit_count", 0) for v in github_data.values())
+    # No commits only counts against the CV if GitHub could actually be asked
+    if total_commits == 0 and "github" not in degraded_services:
         score += 0.5  # suspicious: no commits
 
     if score > 1.5:
@@ -133,38 +198,46 @@ def risk_node(state: CVState) -> CVState:
     else:
         decision = "Accept"
 
-    state["risk"] = {
+    risk = {
         "risk_score": round(score, 2),
         "decision": decision,
         "total_commits": total_commits
     }
-
-    return state
+    if degraded_services:
+        # Scored without some external evidence; worth a second look later
+        risk["degraded"] = degraded_services
+    return {"risk": risk}
 
 
 # -----------------------------
 # GRAPH BUILD
 # -----------------------------
 
+# Independent checks between the parser and the risk aggregation.
+CHECK_NODES = ("tavily", "github", "overlap", "location", "company")
+
+
 def build_cv_graph():
     graph = StateGraph(CVState)
 
-    graph.add_node("resume_parser", resume_parser_node)
-    graph.add_node("tavily", tavily_node)
-    graph.add_node("github", github_node)
-    graph.add_node("overlap", overlap_node)
-    graph.add_node("location", location_node)
-    graph.add_node("company", company_node)
-    graph.add_node("risk", risk_node)
+    # Every node reports its wall time and external calls (nodes/tracing.py)
+
+    graph.add_node("resume_parser", traced("resume_parser", resume_parser_node))
+    graph.add_node("tavily", traced("tavily", tavily_node))
+    graph.add_node("github", traced("github", github_node))
+    graph.add_node("overlap", traced("overlap", overlap_node))
+    graph.add_node("location", traced("location", location_node))
+    graph.add_node("company", traced("company", company_node))
+    graph.add_node("risk", traced("risk", risk_node))
 
     graph.set_entry_point("resume_parser")
 
-    graph.add_edge("resume_parser", "tavily")
-    graph.add_edge("tavily", "github")
-    graph.add_edge("github", "overlap")
-    graph.add_edge("overlap", "location")
-    graph.add_edge("location", "company")
-    graph.add_edge("company", "risk")
+    # Fan out: the checks only read `parsed_cv`, so they run concurrently.
+    # CVs without any extractable text end right after the parser.
+    graph.add_conditional_edges("resume_parser", route_after_parser, [*CHECK_NODES, END])
+
+    # Fan in: `risk` waits until every check has written its key.
+    graph.add_edge(list(CHECK_NODES), "risk")
     graph.add_edge("risk", END)
 
     return graph.compile()
@@ -174,12 +247,38 @@ def build_cv_graph():
 # EXECUTION FUNCTION
 # -----------------------------
 
+# Compiled graphs are immutable and safe to share between threads, so the
+# process builds one and reuses it for every submission.
+_compiled_graph = None
+_compiled_graph_lock = threading.Lock()
+
+
+def get_cv_graph():
+    """Return the process-wide compiled graph, building it on first use."""
+    global _compiled_graph
+    if _compiled_graph is None:
+        with _compiled_graph_lock:
+            if _compiled_graph is None:
+                _compiled_graph = build_cv_graph()
+    return _compiled_graph
+
+
 def run_cv_graph(file_path: str):
-    app = build_cv_graph()
+    app = get_cv_graph()
 
     initial_state = {
-        "file_path": file_path
+        "file_path": file_path,
+        "deadline": new_deadline(),
     }
 
-    result = app.invoke(initial_state)
+    with run_trace() as trace:
+        try:
+            result = app.invoke(initial_state)
+        except Exception as e:
+            # Callers record the partial trace with the failure
+            e.timings = trace
+            raise
+    # The deadline only matters while the graph runs
+    result.pop("deadline", None)
+    result["timings"] = trace
     return result
@@ -0,0 +1,91 @@
+"""Shared date-interval helpers for the role overlap checks.
+
+Roles are normalized once (dates parsed, ongoing roles extended to
+`datetime.max`), sorted by start and swept with an active set ordered by end
+date. Every role still active when another one starts overlaps it, so all
+overlapping pairs are found in O(n log n + k) instead of comparing each pair.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+import heapq
+
+_FORMATS = ("%Y-%m-%d", "%Y-%m", "%Y", "%b %Y", "%B %Y")
+
+# (input index, start, end, role)
+Interval = Tuple[int, datetime, datetime, Dict]
+
+
+@lru_cache(maxsize=4096)
+def _parse_str(d: str) -> Optional[datetime]:
+	# Try ISO first, then common human formats like 'Jun 2025'
+	try:
+		return datetime.fromisoformat(d)
+	except ValueError:
+		pass
+	for fmt in _FORMATS:
+		try:
+			return datetime.strptime(d, fmt)
+		except ValueError:
+			continue
+	return None
+
+
+def parse_date(d) -> Optional[datetime]:
+	"""Tolerant date parsing; returns None for missing or unparseable values."""
+	if isinstance(d, str):
+		return _parse_str(d.strip())
+	return None
+
+
+def normalize_roles(roles: List[Dict]) -> List[Interval]:
+	"""Parse each role's dates once, skipping roles without a valid start."""
+	normalized = []
+	for i, r in enumerate(roles):
+		start = parse_date(r.get("start"))
+		if start is None:
+			continue
+		end = parse_date(r.get("end"))
+		if end is None:
+			# treat ongoing as far future
+			end = datetime.max
+		normalized.append((i, start, end, r))
+	return normalized
+
+
+def overlapping_pairs(
+	intervals: List[Interval],
+	conflicts: Optional[Callable[[Dict, Dict], bool]] = None,
+) -> List[Tuple[Dict, Dict]]:
+	"""Return role pairs whose closed [start, end] ranges intersect.
+
+	Pairs are ordered as a nested i < j loop over the input would produce
+	them. `conflicts`, when given, filters pairs that overlap in time.
+	"""
+	roles = {iv[0]: iv[3] for iv in intervals}
+	return [(roles[a], roles[b]) for a, b in overlapping_index_pairs(intervals, conflicts)]
+
+
+def overlapping_index_pairs(
+	intervals: List[Interval],
+	conflicts: Optional[Callable[[Dict, Dict], bool]] = None,
+) -> List[Tuple[int, int]]:
+	"""Like `overlapping_pairs`, but as (i, j) indices into the input roles."""
+	found: List[Tuple[int, int]] = []
+	active: List[Tuple[datetime, int, Interval]] = []
+	for iv in sorted(intervals, key=lambda iv: (iv[1], iv[0])):
+		idx, start = iv[0], iv[1]
+		if iv[2] < start:
+			# ends before it starts: cannot overlap anything
+			continue
+		# drop roles that ended before this one started
+		while active and active[0][0] < start:
+			heapq.heappop(active)
+		for _, _, other in active:
+			a, b = (other, iv) if other[0] < idx else (iv, other)
+			if conflicts is None or conflicts(a[3], b[3]):
+				found.append((a[0], b[0]))
+		heapq.heappush(active, (iv[2], idx, iv))
+
+	found.sort()
+	return found
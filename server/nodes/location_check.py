@@ -6,29 +6,21 @@ Each role is expected to contain:
   - "end": "YYYY-MM-DD" or None
 
 This module exposes `detect_conflicting_locations` which returns overlapping
-roles that were in different cities at the same time.
+roles that were in different cities at the same time, and
+`conflicting_location_indices` which returns them as indices into the role list.
 """
 from typing import List, Dict, Tuple
-from datetime import datetime
 
+from nodes.intervals import normalize_roles, overlapping_index_pairs, overlapping_pairs
 
-def _parse_date(d: str):
-	if d is None:
-		return None
-	# tolerant parsing: try ISO then common formats
-	if isinstance(d, str):
-		d = d.strip()
-		try:
-			return datetime.fromisoformat(d)
-		except Exception:
-			pass
-		for fmt in ("%Y-%m-%d", "%Y-%m", "%Y", "%b %Y", "%B %Y"):
-			try:
-				return datetime.strptime(d, fmt)
-			except Exception:
-				continue
-		return None
-	return None
+
+def _city(role: Dict) -> str:
+	return (role.get("location") or "").strip().lower()
+
+
+def _different_cities(a: Dict, b: Dict) -> bool:
+	la, lb = _city(a), _city(b)
+	return bool(la and lb and la != lb)
 
 
 def detect_conflicting_locations(roles: List[Dict]) -> List[Tuple[Dict, Dict]]:
@@ -40,27 +32,9 @@ def detect_conflicting_locations(roles: List[Dict]) -> List[Tuple[Dict, Dict]]:
 	Returns:
 		list of tuple pairs (role_a, role_b) representing conflicts.
 	"""
-	normalized = []
-	for r in roles:
-		start = _parse_date(r.get("start"))
-		# skip roles without a valid start date
-		if start is None:
-			continue
-		end = _parse_date(r.get("end"))
-		if end is None:
-			end = datetime.max
-		loc = (r.get("location") or "").strip().lower()
-		normalized.append((r, start, end, loc))
+	return overlapping_pairs(normalize_roles(roles), _different_cities)
 
-	conflicts = []
-	n = len(normalized)
-	for i in range(n):
-		ri, si, ei, li = normalized[i]
-		for j in range(i + 1, n):
-			rj, sj, ej, lj = normalized[j]
-			latest_start = max(si, sj)
-			earliest_end = min(ei, ej)
-			if latest_start <= earliest_end and li and lj and li != lj:
-				conflicts.append((ri, rj))
 
-	return conflicts
+def conflicting_location_indices(roles: List[Dict]) -> List[Tuple[int, int]]:
+	"""Pairs (i, j), i < j, of indices into `roles` in different cities at the same time."""
+	return overlapping_index_pairs(normalize_roles(roles), _different_cities)
@@ -7,41 +7,12 @@ Each role is expected to be a dict with at least:
   - "full_time": bool
 
 The primary helper `detect_full_time_overlaps` returns pairs of roles that
-overlap while both marked full-time.
+overlap while both marked full-time; `full_time_overlap_indices` returns the
+same pairs as indices into the role list.
 """
 from typing import List, Dict, Tuple
-from datetime import datetime
 
-
-def _parse_date(d: str):
-	if d is None:
-		return None
-	# Be tolerant: accept ISO formats or common human formats like 'Jun 2025'
-	if d is None:
-		return None
-	if isinstance(d, str):
-		d = d.strip()
-		# Try ISO first
-		try:
-			return datetime.fromisoformat(d)
-		except Exception:
-			pass
-		# Try YYYY-MM-DD or YYYY-MM
-		for fmt in ("%Y-%m-%d", "%Y-%m", "%Y"):
-			try:
-				return datetime.strptime(d, fmt)
-			except Exception:
-				continue
-		# Try 'Jun 2025' or 'June 2025'
-		for fmt in ("%b %Y", "%B %Y"):
-			try:
-				return datetime.strptime(d, fmt)
-			except Exception:
-				continue
-		# last resort: None
-		return None
-	# If not a string, return None
-	return None
+from nodes.intervals import normalize_roles, overlapping_index_pairs, overlapping_pairs
 
 
 def detect_full_time_overlaps(roles: List[Dict]) -> List[Tuple[Dict, Dict]]:
@@ -53,32 +24,12 @@ def detect_full_time_overlaps(roles: List[Dict]) -> List[Tuple[Dict, Dict]]:
 	Returns:
 		list of tuple pairs indicating overlapping roles.
 	"""
-	normalized = []
-	for r in roles:
-		start = _parse_date(r.get("start"))
-		# skip roles without a valid start date since we can't compare
-		if start is None:
-			continue
-		end = _parse_date(r.get("end"))
-		if end is None:
-			# treat ongoing as far future
-			end = datetime.max
-		normalized.append((r, start, end))
-
-	overlaps = []
-	n = len(normalized)
-	for i in range(n):
-		ri, si, ei = normalized[i]
-		if not ri.get("full_time", False):
-			continue
-		for j in range(i + 1, n):
-			rj, sj, ej = normalized[j]
-			if not rj.get("full_time", False):
-				continue
-			latest_start = max(si, sj)
-			earliest_end = min(ei, ej)
-			if latest_start <= earliest_end:
-				overlaps.append((ri, rj))
+	# Only full-time roles can conflict, so drop the rest before sweeping
+	full_time = [iv for iv in normalize_roles(roles) if iv[3].get("full_time", False)]
+	return overlapping_pairs(full_time)
 
-	return overlaps
 
+def full_time_overlap_indices(roles: List[Dict]) -> List[Tuple[int, int]]:
+	"""Pairs (i, j), i < j, of indices into `roles` that overlap while both full-time."""
+	full_time = [iv for iv in normalize_roles(roles) if iv[3].get("full_time", False)]
+	return overlapping_index_pairs(full_time)
@@ -0,0 +1,201 @@
+"""PDF text extraction in a process pool, with an on-disk text cache.
+
+pdfplumber is CPU-bound and holds the GIL, so extraction runs in separate
+processes instead of the calling thread. Large documents are split into page
+ranges that are extracted in parallel. Each worker process is capped at
+`PDF_MAX_MEMORY_MB` of address space and each document at
+`PDF_EXTRACT_TIMEOUT` seconds; a document that breaks either limit, or whose
+worker dies, raises `ExtractionFailed` rather than stalling the caller. Only
+a PDF that really has no text yields "".
+
+Extracted text is cached in `PDF_TEXT_CACHE_DIR` under the SHA-256 of the
+file, so reprocessing or re-verifying the same file never extracts it twice.
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import multiprocessing
+import multiprocessing.queues
+import multiprocessing.util
+import os
+import signal
+import threading
+import time
+import uuid
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "60"))
+PDF_MAX_MEMORY_MB = int(os.getenv("PDF_MAX_MEMORY_MB", "1024"))
+# Default is server/data/text_cache wherever the process was started from
+_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_TEXT_CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", os.path.join(_SERVER_DIR, "data", "text_cache"))
+
+
+class ExtractionFailed(Exception):
+    """Extraction did not finish (timeout, memory cap, crashed or failed
+    worker); the document may well have text, so this is not "no text"."""
+
+
+# -----------------------------
+# WORKER SIDE
+# -----------------------------
+
+def _init_worker(max_memory_mb: int, pids) -> None:
+    # The parent kills stuck workers by pid (see _reset_pool)
+    pids.put(os.getpid())
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not supported on this platform; run without a memory cap
+        pass
+
+
+def _extract_range(path: str, start: int, stop: int) -> Tuple[int, List[str]]:
+    """Extract pages [start, stop) and return (total page count, page texts)."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        pages = pdf.pages
+        texts = []
+        for page in pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            # release the parsed page objects as we go
+            page.close()
+        return len(pages), texts
+
+
+# -----------------------------
+# POOL
+# -----------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# pool -> queue of its workers' pids. ProcessPoolExecutor has no public way
+# to reach its processes, so each worker reports itself from the initializer.
+_pool_pids: Dict[ProcessPoolExecutor, multiprocessing.queues.SimpleQueue] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: callers are threaded, forking them is unsafe
+                ctx = multiprocessing.get_context("spawn")
+                pids = ctx.SimpleQueue()
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(PDF_MAX_MEMORY_MB, pids),
+                )
+                _pool_pids[_pool] = pids
+                # A multiprocessing child joins its children before atexit
+                # hooks run, so stop the pool first or the caller's exit hangs
+                multiprocessing.util.Finalize(None, _shutdown_pool, exitpriority=10)
+    return _pool
+
+
+def _shutdown_pool() -> None:
+    # Runs at exit, when no extraction is in flight
+    pool = _pool
+    if pool is not None:
+        _reset_pool(pool)
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill a pool whose workers are stuck or dead so the next call starts fresh."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+        pids = _pool_pids.pop(pool, None)
+    # ProcessPoolExecutor cannot cancel a running task; terminate its workers
+    if pids is not None:
+        while not pids.empty():
+            try:
+                os.kill(pids.get(), signal.SIGTERM)
+            except OSError:
+                # already exited
+                pass
+        pids.close()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_in_pool(path: str) -> str:
+    pool = _get_pool()
+    deadline = time.monotonic() + PDF_EXTRACT_TIMEOUT
+    try:
+        # The first range also tells us how many pages there are
+        total, texts = pool.submit(_extract_range, path, 0, PDF_PAGES_PER_TASK).result(
+            timeout=PDF_EXTRACT_TIMEOUT
+        )
+        futures = [
+            pool.submit(_extract_range, path, start, start + PDF_PAGES_PER_TASK)
+            for start in range(PDF_PAGES_PER_TASK, total, PDF_PAGES_PER_TASK)
+        ]
+        if futures:
+            _, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            if not_done:
+                raise FutureTimeout()
+            for fut in futures:
+                texts.extend(fut.result()[1])
+    except FutureTimeout:
+        _reset_pool(pool)
+        raise ExtractionFailed(f"extraction of {path} exceeded {PDF_EXTRACT_TIMEOUT}s")
+    except MemoryError:
+        raise ExtractionFailed(f"extraction of {path} exceeded {PDF_MAX_MEMORY_MB}MB")
+    except BrokenProcessPool as e:
+        # a worker died mid-document (e.g. killed by the OOM killer)
+        _reset_pool(pool)
+        raise ExtractionFailed(f"extraction of {path} crashed its worker: {e}")
+    except Exception as e:
+        raise ExtractionFailed(f"extraction of {path} failed: {e}") from e
+
+    return "".join(t + "\n" for t in texts if t)
+
+
+# -----------------------------
+# TEXT CACHE
+# -----------------------------
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(sha256: str) -> str:
+    return os.path.join(PDF_TEXT_CACHE_DIR, f"{sha256}.txt")
+
+
+def extract_pdf_text(path: str) -> str:
+    """Return the text of a PDF, from the cache when this file was seen before."""
+    sha256 = file_sha256(path)
+    cached = _cache_path(sha256)
+    try:
+        with open(cached, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    text = _extract_in_pool(os.path.abspath(path))
+    if text:
+        # Write-then-rename so concurrent readers never see a partial file
+        try:
+            os.makedirs(PDF_TEXT_CACHE_DIR, exist_ok=True)
+            tmp = f"{cached}.{uuid.uuid4().hex}.part"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, cached)
+        except OSError as e:
+            print(f"[pdf] could not cache text for {path}: {e}")
+    return text
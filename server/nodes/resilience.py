@@ -0,0 +1,133 @@
+"""Deadlines and circuit breakers for the nodes that call external services.
+
+Each graph run gets a deadline (`CVState["deadline"]`, epoch seconds) that
+nodes pass down to their clients. Clients cap every request timeout at the
+time left and give up once it is spent, so one slow service cannot hold a
+worker for minutes.
+
+Each service (GitHub, Tavily, Gemini) also has a process-wide circuit
+breaker. After `BREAKER_FAILURE_THRESHOLD` consecutive failures (timeouts,
+connection errors, 5xx) it opens, and calls fail immediately for
+`BREAKER_RESET_SECONDS`. Then one probe request is let through (half-open):
+success closes the breaker, failure opens it again. Nodes turn a refused or
+failed call into a degraded result that is flagged in `CVState["degraded"]`
+and in the final `risk`.
+"""
+from typing import Dict, Optional
+import os
+import threading
+import time
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# Budget for one CV's external checks; 0 disables the deadline
+CV_DEADLINE_SECONDS = float(os.getenv("CV_DEADLINE_SECONDS", "90"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ServiceUnavailable(Exception):
+    """A call was refused: the service's breaker is open or the deadline is spent."""
+
+
+# -----------------------------
+# DEADLINES
+# -----------------------------
+
+def new_deadline(seconds: float = CV_DEADLINE_SECONDS) -> Optional[float]:
+    return time.time() + seconds if seconds > 0 else None
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left before `deadline`, or None when there is no deadline."""
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def call_timeout(default: float, deadline: Optional[float]) -> float:
+    """`default` capped at the time left; raises once the deadline has passed."""
+    left = remaining(deadline)
+    if left is None:
+        return default
+    if left <= 0:
+        raise ServiceUnavailable("CV deadline exceeded")
+    return min(default, left)
+
+
+# -----------------------------
+# CIRCUIT BREAKERS
+# -----------------------------
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe may."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self.reset_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_started = now
+                return True
+            # A probe that never reported back must not wedge the breaker
+            if now - self._probe_started >= self.reset_seconds:
+                self._probe_started = now
+                return True
+            return False
+
+    def check(self) -> None:
+        """Raise ServiceUnavailable unless a call may go out."""
+        if not self.allow():
+            raise ServiceUnavailable(f"{self.name} circuit open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"[breaker] {self.name} opened after {self.failures} failure(s)")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(service: str) -> CircuitBreaker:
+    """The process-wide breaker for `service`."""
+    with _breakers_lock:
+        b = _breakers.get(service)
+        if b is None:
+            b = _breakers[service] = CircuitBreaker(service)
+        return b
+
+
+def breaker_states() -> Dict[str, str]:
+    with _breakers_lock:
+        return {name: b.state for name, b in _breakers.items()}
+
+
+def degraded(service: str, error: Exception) -> Dict[str, str]:
+    """Entry for `CVState["degraded"]`."""
+    return {"service": service, "reason": f"{type(error).__name__}: {error}"[:200]}
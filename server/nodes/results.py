@@ -0,0 +1,194 @@
+"""Compact, typed form of a verification graph run.
+
+The graph state holds everything the checks looked at: every commit with its
+message and URL, full search payloads, the raw CV line of each role. Stored
+as-is in `requests.graph_results`, that made request documents large and
+every list query slow. `CVResult.from_state` keeps only what the decision
+needs; checks refer to roles by index into `roles` instead of copying them:
+
+  {"schema": 2,
+   "roles": [{"title": "Engineer", "company": "Acme", "start": "2019-01-01", ...}],
+   "github_repos": [...], "linkedin": "...",
+   "overlaps": [[0, 1]], "location_conflicts": [],
+   "github": {"<repo>": {"commit_count": 12, "score": 0.6, "by_role": [[0, 12, 0.6]]}},
+   "company_checks": [{"role": 0, "match": true, "score": 0.8, "reason": "..."}],
+   "search_results": 5,
+   "risk": {"risk_score": 0.4, "decision": "Accept", "total_commits": 12},
+   "degraded": [...]}           # only when a service was unavailable
+
+`evidence(state)` returns the raw material the compact form leaves out
+(commits, search results, role lines, verdict details). It is stored
+separately, by app/evidence.py, and only loaded when asked for.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA_VERSION = 2
+
+
+@dataclass(slots=True)
+class Role:
+    title: str
+    company: str = ""
+    start: Optional[str] = None
+    end: Optional[str] = None
+    location: str = ""
+    full_time: bool = True
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Role":
+        return cls(
+            title=d.get("title", ""),
+            company=d.get("company", ""),
+            start=d.get("start"),
+            end=d.get("end"),
+            location=d.get("location", ""),
+            full_time=bool(d.get("full_time", True)),
+        )
+
+
+@dataclass(slots=True)
+class ParsedCV:
+    roles: List[Role] = field(default_factory=list)
+    github_repos: List[str] = field(default_factory=list)
+    linkedin: str = ""
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ParsedCV":
+        return cls(
+            roles=[Role.from_dict(r) for r in d.get("roles", [])],
+            github_repos=list(d.get("github_repos", [])),
+            linkedin=d.get("linkedin", ""),
+        )
+
+
+@dataclass(slots=True)
+class RepoActivity:
+    commit_count: int
+    score: float
+    # (role index, commits since that role started, activity score)
+    by_role: List[Tuple[int, int, float]] = field(default_factory=list)
+    error: Optional[str] = None
+    degraded: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RepoActivity":
+        return cls(
+            commit_count=d.get("commit_count", 0),
+            score=d.get("score", 0),
+            by_role=[(r["role"], r["commit_count"], r["score"]) for r in d.get("by_role", [])],
+            error=d.get("error"),
+            degraded=d.get("degraded"),
+        )
+
+
+@dataclass(slots=True)
+class CompanyCheck:
+    role: int
+    match: bool
+    score: Optional[float] = None
+    reason: str = ""
+    degraded: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CompanyCheck":
+        details = d.get("details") or {}
+        return cls(
+            role=d["role"],
+            match=bool(d.get("match")),
+            score=details.get("score"),
+            reason=details.get("reason", ""),
+            degraded=details.get("degraded"),
+        )
+
+
+@dataclass(slots=True)
+class Risk:
+    risk_score: Optional[float]
+    decision: str
+    total_commits: int = 0
+    reason: Optional[str] = None
+    degraded: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Risk":
+        return cls(
+            risk_score=d.get("risk_score"),
+            decision=d.get("decision", "Manual Review"),
+            total_commits=d.get("total_commits", 0),
+            reason=d.get("reason"),
+            degraded=list(d.get("degraded", [])),
+        )
+
+
+@dataclass(slots=True)
+class CVResult:
+    parsed: ParsedCV
+    risk: Risk
+    overlaps: List[Tuple[int, int]] = field(default_factory=list)
+    location_conflicts: List[Tuple[int, int]] = field(default_factory=list)
+    github: Dict[str, RepoActivity] = field(default_factory=dict)
+    company_checks: List[CompanyCheck] = field(default_factory=list)
+    search_results: int = 0
+    degraded: List[Dict[str, str]] = field(default_factory=list)
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CVResult":
+        return cls(
+            parsed=ParsedCV.from_dict(state.get("parsed_cv") or {}),
+            risk=Risk.from_dict(state.get("risk") or {}),
+            overlaps=[tuple(p) for p in state.get("overlaps", [])],
+            location_conflicts=[tuple(p) for p in state.get("location_conflicts", [])],
+            github={repo: RepoActivity.from_dict(d) for repo, d in (state.get("github_commits") or {}).items()},
+            company_checks=[CompanyCheck.from_dict(c) for c in state.get("company_checks", [])],
+            # Placeholder entries (no API configured, errors) are not results
+            search_results=sum(1 for r in state.get("tavily_results", []) if r.get("link")),
+            degraded=list(state.get("degraded", [])),
+        )
+
+    def to_doc(self) -> Dict[str, Any]:
+        """The document stored as `graph_results`; empty and None fields are left out."""
+        doc: Dict[str, Any] = {
+            "schema": SCHEMA_VERSION,
+            "roles": [_compact(r) for r in self.parsed.roles],
+            "github_repos": self.parsed.github_repos,
+            "linkedin": self.parsed.linkedin,
+            "overlaps": [list(p) for p in self.overlaps],
+            "location_conflicts": [list(p) for p in self.location_conflicts],
+            "github": {
+                repo: _compact(a, by_role=[list(r) for r in a.by_role])
+                for repo, a in self.github.items()
+            },
+            "company_checks": [_compact(c) for c in self.company_checks],
+            "search_results": self.search_results,
+            # risk_score stays even when None: "not scored" is part of the answer
+            "risk": {"risk_score": self.risk.risk_score, **_compact(self.risk)},
+        }
+        if self.degraded:
+            doc["degraded"] = self.degraded
+        return doc
+
+
+def _compact(obj, **overrides) -> Dict[str, Any]:
+    out = {}
+    for name in obj.__slots__:
+        value = overrides.get(name, getattr(obj, name))
+        if value is None or value == "" or value == []:
+            continue
+        out[name] = value
+    return out
+
+
+def evidence(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Raw material behind a result, for the detail view."""
+    return {
+        "role_lines": [r.get("description", "") for r in (state.get("parsed_cv") or {}).get("roles", [])],
+        "commits": {repo: d.get("commits", []) for repo, d in (state.get("github_commits") or {}).items()},
+        "search_results": state.get("tavily_results", []),
+        "company_details": [c.get("details") for c in state.get("company_checks", [])],
+    }
+
+
+def summarize(state: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(compact graph_results document, raw evidence) for one graph run."""
+    return CVResult.from_state(state).to_doc(), evidence(state)
@@ -1,7 +1,35 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import re
-import pdfplumber
-import os
+
+from nodes.pdf_text import ExtractionFailed, extract_pdf_text
+from nodes.word_text import ZIP_MAGIC, OLE_MAGIC, extract_docx_text, extract_doc_text
+
+
+# -----------------------------
+# PATTERNS AND TABLES
+# -----------------------------
+
+# Compiled once at import; the parser runs them for every line of every CV.
+ROLE_RE = re.compile(r"(Engineer|Developer|Intern|Manager|Director)", re.I)
+# capture common date-like tokens separated by non-word chars
+DATE_TOKEN_RE = re.compile(
+    r"(\d{4}-\d{2}-\d{2}|\d{4}-\d{2}|\b[A-Za-z]{3,9}\s\d{4}\b|\d{4}|present|ongoing|current|now)",
+    re.I,
+)
+# One anchored pattern for every normalizable token shape:
+# YYYY-MM-DD | YYYY-MM | YYYY | Month YYYY
+DATE_SHAPE_RE = re.compile(
+    r"^(?:(?P<ymd>\d{4}-\d{2}-\d{2})|(?P<ym>\d{4}-\d{2})|(?P<y>\d{4})|(?P<mon>[A-Za-z]{3,9})\s+(?P<mon_y>\d{4}))$"
+)
+LOCATION_RE = re.compile(r"\b[A-Z][a-z]+,\s?[A-Z]{2}\b")
+GITHUB_RE = re.compile(r"https?://github\.com/[\w\-\./]+")
+LINKEDIN_RE = re.compile(r"https?://www\.linkedin\.com/in/[\w\-]+")
+
+MONTHS = {
+    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04', 'may': '05', 'jun': '06',
+    'jul': '07', 'aug': '08', 'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
+}
+OPEN_ENDED = frozenset(("present", "ongoing", "current", "now"))
 
 
 def extract_lines(text: str) -> List[str]:
@@ -10,45 +38,32 @@ def extract_lines(text: str) -> List[str]:
     return [line.strip() for line in text.splitlines() if line.strip()]
 
 
-def parse_dates(line: str) -> Tuple[str, str]:
-    # Try common date patterns and normalize to ISO YYYY-MM-DD (best-effort)
-    def normalize_date(token: str):
-        if not token:
-            return None
-        token = token.strip()
-        lower = token.lower()
-        if lower in ("present", "ongoing", "current", "now"):
-            return None
-
-        # YYYY-MM-DD or YYYY-MM
-        m = re.match(r"^(\d{4})-(\d{2})-(\d{2})$", token)
-        if m:
-            return token
-        m = re.match(r"^(\d{4})-(\d{2})$", token)
-        if m:
-            return f"{m.group(1)}-{m.group(2)}-01"
-
-        # YYYY
-        m = re.match(r"^(\d{4})$", token)
-        if m:
-            return f"{m.group(1)}-01-01"
-
-        # Month YYYY like 'Jun 2025' or 'June 2025'
-        months = {
-            'jan': '01','feb':'02','mar':'03','apr':'04','may':'05','jun':'06',
-            'jul':'07','aug':'08','sep':'09','oct':'10','nov':'11','dec':'12'
-        }
-        m = re.match(r"^([A-Za-z]{3,9})\s+(\d{4})$", token)
-        if m:
-            mon = m.group(1)[:3].lower()
-            mm = months.get(mon)
-            if mm:
-                return f"{m.group(2)}-{mm}-01"
+def normalize_date(token: str) -> Optional[str]:
+    """Normalize a date token to ISO YYYY-MM-DD (best-effort)."""
+    if not token:
+        return None
+    token = token.strip()
+    if token.lower() in OPEN_ENDED:
+        return None
 
+    m = DATE_SHAPE_RE.match(token)
+    if not m:
         return None
+    if m.group("ymd"):
+        return token
+    if m.group("ym"):
+        return f"{token}-01"
+    if m.group("y"):
+        return f"{token}-01-01"
+    mm = MONTHS.get(m.group("mon")[:3].lower())
+    if mm:
+        return f"{m.group('mon_y')}-{mm}-01"
+    return None
+
 
-    # capture common date-like tokens separated by non-word chars
-    matches = re.findall(r"(\d{4}-\d{2}-\d{2}|\d{4}-\d{2}|\b[A-Za-z]{3,9}\s\d{4}\b|\d{4}|present|ongoing|current|now)", line, flags=re.I)
+def parse_dates(line: str) -> Tuple[str, str]:
+    # Try common date patterns and normalize to ISO YYYY-MM-DD (best-effort)
+    matches = DATE_TOKEN_RE.findall(line)
     start = normalize_date(matches[0]) if matches else None
     end = None
     if len(matches) > 1:
@@ -57,63 +72,102 @@ def parse_dates(line: str) -> Tuple[str, str]:
 
 
 def parse_location(line: str) -> str:
-    match = re.search(r"\b[A-Z][a-z]+,\s?[A-Z]{2}\b", line)
+    match = LOCATION_RE.search(line)
     return match.group(0) if match else ""
 
 
+def _role_from_line(line: str, title_match: "re.Match") -> Dict[str, Any]:
+    start, end = parse_dates(line)
+    title = title_match.group(0)
+    return {
+        "title": title,
+        # text before the first occurrence of the title
+        "company": line[:title_match.start()].strip(),
+        "start": start,
+        "end": end,
+        "full_time": True,
+        "location": parse_location(line),
+        "description": line,
+        "expected_keywords": ""
+    }
+
+
 def parse_roles(lines: List[str]) -> List[Dict[str, Any]]:
     roles: List[Dict[str, Any]] = []
     for line in lines:
-        if re.search(r"(Engineer|Developer|Intern|Manager|Director)", line, re.I):
-            start, end = parse_dates(line)
-            location = parse_location(line)
-            title_match = re.search(r"(Engineer|Developer|Intern|Manager|Director)", line, re.I)
-            title = title_match.group(0) if title_match else line.strip()
-            company = line.split(title)[0].strip() if title in line else "Unknown"
-            roles.append({
-                "title": title,
-                "company": company,
-                "start": start,
-                "end": end,
-                "full_time": "full-time" in line.lower() or True,
-                "location": location,
-                "description": line.strip(),
-                "expected_keywords": ""
-            })
+        line = line.strip()
+        m = ROLE_RE.search(line)
+        if m:
+            roles.append(_role_from_line(line, m))
     return roles
 
 
 def parse_github(text: str) -> List[str]:
-    return re.findall(r"https?://github\.com/[\w\-\./]+", text)
+    return GITHUB_RE.findall(text)
 
 
 def parse_linkedin(text: str) -> str:
-    matches = re.findall(r"https?://www\.linkedin\.com/in/[\w\-]+", text)
-    return matches[0] if matches else ""
+    m = LINKEDIN_RE.search(text)
+    return m.group(0) if m else ""
 
 
-def node_resume_parser(file_path: str) -> Dict[str, Any]:
-    text = ""
+def parse_text(text: str) -> Dict[str, Any]:
+    """Parse CV text in a single pass over its lines.
+
+    Equivalent to running `parse_roles`, `parse_github` and `parse_linkedin`
+    separately, but each line is visited once.
+    """
+    roles: List[Dict[str, Any]] = []
+    github_repos: List[str] = []
+    linkedin = ""
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        m = ROLE_RE.search(line)
+        if m:
+            roles.append(_role_from_line(line, m))
+        # URLs never span lines, so per-line matching sees the same links
+        if "github.com" in line:
+            github_repos.extend(GITHUB_RE.findall(line))
+        if not linkedin and "linkedin.com" in line:
+            linkedin = parse_linkedin(line)
+
+    return {
+        "roles": roles,
+        "github_repos": github_repos,
+        "linkedin": linkedin,
+    }
+
+
+def extract_text(file_path: str) -> str:
+    """Extract CV text, choosing the extractor from the file's magic bytes.
+
+    Uploads may carry the wrong extension, so the content decides; plain
+    text is the fallback for anything unrecognised.
+    """
     try:
-        if file_path.lower().endswith(".pdf"):
-            # file_path may be absolute or relative to configured upload dir
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    t = page.extract_text()
-                    if t:
-                        text += t + "\n"
-        else:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
+        with open(file_path, "rb") as f:
+            head = f.read(8)
+
+        if head.startswith(b"%PDF"):
+            # file_path may be absolute or relative to configured upload dir;
+            # extraction runs in a process pool and is cached by file hash
+            return extract_pdf_text(file_path)
+        if head.startswith(ZIP_MAGIC):
+            return extract_docx_text(file_path)
+        if head.startswith(OLE_MAGIC):
+            return extract_doc_text(file_path)
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except ExtractionFailed:
+        # Not an empty CV: let the job fail and be retried
+        raise
     except Exception:
-        text = ""
+        return ""
 
-    lines = extract_lines(text)
 
-    cv = {
-        "roles": parse_roles(lines),
-        "github_repos": parse_github(text),
-        "linkedin": parse_linkedin(text),
-    }
-
-    return cv
+def node_resume_parser(file_path: str) -> Dict[str, Any]:
+    return parse_text(extract_text(file_path))
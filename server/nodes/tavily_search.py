@@ -5,28 +5,320 @@ call a Tavily search API when an API URL / key are provided via environment
 variables. When no API is configured the function returns a structured
 placeholder so callers can be tested locally.
 
-The function is intentionally small and easy to replace with a real
-integration later.
+The query (candidate name + first title) repeats across resubmissions and
+common names, so each search goes through, in order:
+
+- a TTL cache keyed by the normalized query, in memory and, when
+  TAVILY_CACHE_PATH is set, in a SQLite file shared by worker processes;
+- single-flight: concurrent identical queries share one in-flight request;
+- a per-minute quota (TAVILY_REQUESTS_PER_MINUTE, per process) that paces
+  bursts below the provider's rate limit instead of getting throttled;
+- an httpx.AsyncClient with keep-alive connections, running on one event
+  loop thread per process. `search_tavily` stays synchronous for the graph.
+
+Requests are refused while the Tavily circuit breaker is open and never
+outlive the CV's deadline (see nodes/resilience.py); the error placeholder
+then carries a `degraded` reason.
 """
-from typing import List, Dict, Optional
-import os
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+import asyncio
 import json
-import urllib.parse
-import urllib.request
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from nodes.resilience import ServiceUnavailable, breaker, remaining
+from nodes.tracing import record_call
+
+TAVILY_TIMEOUT_SECONDS = float(os.getenv("TAVILY_TIMEOUT_SECONDS", "10"))
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", "10"))
+# 0 disables the quota; it applies per process, so split the account's limit
+# between worker processes
+TAVILY_REQUESTS_PER_MINUTE = int(os.getenv("TAVILY_REQUESTS_PER_MINUTE", "60"))
+# Longest a search waits for quota before giving up with a placeholder
+TAVILY_MAX_QUOTA_WAIT_SECONDS = float(os.getenv("TAVILY_MAX_QUOTA_WAIT_SECONDS", "30"))
+TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH")
+TAVILY_CACHE_TTL_SECONDS = float(os.getenv("TAVILY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TAVILY_CACHE_MAX_ENTRIES = int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "10000"))
+
+_stats = {"cache_hits": 0, "cache_misses": 0, "requests": 0, "coalesced": 0, "quota_waits": 0}
+_stats_lock = threading.Lock()
+
+
+class QuotaExceeded(Exception):
+	"""The per-minute quota would not free up within TAVILY_MAX_QUOTA_WAIT_SECONDS."""
+
+
+def _bump(key: str) -> None:
+	with _stats_lock:
+		_stats[key] += 1
+
+
+def search_stats() -> Dict[str, int]:
+	"""Counters for cache hits/misses, requests sent, coalesced waits and quota waits."""
+	with _stats_lock:
+		return dict(_stats)
+
+
+def normalize_query(query: str) -> str:
+	return re.sub(r"\s+", " ", query).strip().lower()
+
+
+# -----------------------------
+# RESULT CACHE
+# -----------------------------
+
+class SearchCache:
+	"""LRU + TTL cache of search results, optionally backed by SQLite.
+
+	The SQLite file is shared by worker processes, so it may be locked by
+	another writer. A failed read is a miss and a failed write keeps only
+	the in-memory entry; neither fails the CV. Expired and surplus rows are
+	pruned when the file is opened and every `PRUNE_EVERY` writes.
+	"""
+
+	PRUNE_EVERY = 100
+
+	def __init__(self, path: Optional[str] = None, ttl: float = TAVILY_CACHE_TTL_SECONDS, max_entries: int = TAVILY_CACHE_MAX_ENTRIES):
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self._mem: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._db = None
+		self._writes = 0
+		if path:
+			try:
+				self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+				self._db.execute(
+					"CREATE TABLE IF NOT EXISTS tavily_cache ("
+					"key TEXT PRIMARY KEY, results TEXT NOT NULL, stored_at REAL NOT NULL)"
+				)
+				self._db.execute("CREATE INDEX IF NOT EXISTS tavily_cache_stored_at ON tavily_cache (stored_at)")
+				self._prune(time.time())
+				self._db.commit()
+			except sqlite3.Error as e:
+				print(f"[tavily] cache file {path} unusable, caching in memory only: {e}")
+				self._db = None
+
+	def get(self, key: str) -> Optional[List[Dict]]:
+		now = time.time()
+		with self._lock:
+			entry = self._mem.get(key)
+			if entry is None and self._db is not None:
+				try:
+					row = self._db.execute(
+						"SELECT stored_at, results FROM tavily_cache WHERE key = ?", (key,)
+					).fetchone()
+				except sqlite3.Error as e:
+					print(f"[tavily] cache read failed: {e}")
+					row = None
+				if row:
+					entry = (row[0], json.loads(row[1]))
+					self._mem[key] = entry
+			if entry is None:
+				return None
+			if now - entry[0] > self.ttl:
+				self._mem.pop(key, None)
+				return None
+			self._mem.move_to_end(key)
+			self._trim()
+			return entry[1]
 
+	def put(self, key: str, results: List[Dict]) -> None:
+		now = time.time()
+		with self._lock:
+			self._mem[key] = (now, results)
+			self._mem.move_to_end(key)
+			self._trim()
+			if self._db is None:
+				return
+			try:
+				self._db.execute(
+					"INSERT OR REPLACE INTO tavily_cache (key, results, stored_at) VALUES (?, ?, ?)",
+					(key, json.dumps(results), now),
+				)
+				self._writes += 1
+				if self._writes % self.PRUNE_EVERY == 0:
+					self._prune(now)
+				self._db.commit()
+			except sqlite3.Error as e:
+				print(f"[tavily] cache write failed, kept in memory only: {e}")
+				try:
+					self._db.rollback()
+				except sqlite3.Error:
+					pass
 
-def search_tavily(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+	def _prune(self, now: float) -> None:
+		# Both deletes walk the stored_at index instead of scanning the table
+		self._db.execute("DELETE FROM tavily_cache WHERE stored_at < ?", (now - self.ttl,))
+		self._db.execute(
+			"DELETE FROM tavily_cache WHERE stored_at < "
+			"(SELECT stored_at FROM tavily_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+			(self.max_entries - 1,),
+		)
+
+	def _trim(self) -> None:
+		while len(self._mem) > self.max_entries:
+			self._mem.popitem(last=False)
+
+
+cache = SearchCache(TAVILY_CACHE_PATH)
+
+
+# -----------------------------
+# QUOTA
+# -----------------------------
+
+class MinuteQuota:
+	"""Sliding one-minute window of request start times.
+
+	Only used from the client's event loop, so it needs no lock.
+	"""
+
+	def __init__(self, per_minute: int, max_wait: float = TAVILY_MAX_QUOTA_WAIT_SECONDS):
+		self.per_minute = per_minute
+		self.max_wait = max_wait
+		self._sent: "deque[float]" = deque()
+		self._blocked_until = 0.0
+
+	def block_for(self, seconds: float) -> None:
+		"""Hold all requests back, e.g. for a 429's Retry-After."""
+		self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+	async def acquire(self, max_wait: Optional[float] = None) -> None:
+		max_wait = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+		if self.per_minute <= 0 and self._blocked_until <= time.monotonic():
+			return
+		waited = False
+		while True:
+			now = time.monotonic()
+			while self._sent and now - self._sent[0] >= 60:
+				self._sent.popleft()
+			wait = self._blocked_until - now
+			if self.per_minute > 0 and len(self._sent) >= self.per_minute:
+				wait = max(wait, 60 - (now - self._sent[0]))
+			if wait <= 0:
+				self._sent.append(now)
+				return
+			if wait > max_wait:
+				raise QuotaExceeded(f"Tavily quota frees up in {wait:.0f}s")
+			if not waited:
+				_bump("quota_waits")
+				waited = True
+			await asyncio.sleep(wait)
+
+
+# -----------------------------
+# CLIENT
+# -----------------------------
+
+class _Client:
+	"""Keep-alive AsyncClient on a dedicated event loop thread, with single-flight."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._http: Optional[httpx.AsyncClient] = None
+		self._quota = MinuteQuota(TAVILY_REQUESTS_PER_MINUTE)
+		# normalized key -> task fetching it; touched only on the loop
+		self._inflight: Dict[str, "asyncio.Task"] = {}
+
+	def _get_loop(self) -> asyncio.AbstractEventLoop:
+		if self._loop is None:
+			with self._lock:
+				if self._loop is None:
+					loop = asyncio.new_event_loop()
+					threading.Thread(target=loop.run_forever, name="tavily", daemon=True).start()
+					self._loop = loop
+		return self._loop
+
+	async def _fetch(self, api_url: str, query: str, max_results: int, budget: float) -> Tuple[List[Dict], int]:
+		started = time.monotonic()
+		await self._quota.acquire(budget)
+		timeout = min(TAVILY_TIMEOUT_SECONDS, budget - (time.monotonic() - started))
+		if timeout <= 0:
+			raise ServiceUnavailable("CV deadline exceeded")
+		if self._http is None:
+			self._http = httpx.AsyncClient(
+				timeout=TAVILY_TIMEOUT_SECONDS,
+				limits=httpx.Limits(max_connections=TAVILY_MAX_CONNECTIONS, keepalive_expiry=60),
+			)
+		_bump("requests")
+		tavily = breaker("tavily")
+		try:
+			resp = await self._http.get(api_url, params={"q": query, "limit": str(max_results)}, timeout=timeout)
+		except httpx.HTTPError:
+			tavily.record_failure()
+			raise
+		if resp.status_code >= 500:
+			tavily.record_failure()
+		else:
+			tavily.record_success()
+		if resp.status_code == 429:
+			retry_after = resp.headers.get("Retry-After", "")
+			self._quota.block_for(float(retry_after) if retry_after.isdigit() else 60)
+		resp.raise_for_status()
+		data = resp.json()
+		if isinstance(data, list):
+			return data[:max_results], len(resp.content)
+		# If the API returns a dict with `results` key
+		if isinstance(data, dict) and "results" in data:
+			return data["results"][:max_results], len(resp.content)
+		return [], len(resp.content)
+
+	async def _search(self, api_url: str, key: str, query: str, max_results: int, budget: float) -> Tuple[List[Dict], int, bool]:
+		"""Returns (results, response bytes, whether this call joined another's request)."""
+		task = self._inflight.get(key)
+		if task is not None:
+			_bump("coalesced")
+			results, _ = await asyncio.shield(task)
+			return results, 0, True
+		task = asyncio.ensure_future(self._fetch(api_url, query, max_results, budget))
+		self._inflight[key] = task
+		task.add_done_callback(lambda _: self._inflight.pop(key, None))
+		results, nbytes = await asyncio.shield(task)
+		return results, nbytes, False
+
+	def search(self, api_url: str, key: str, query: str, max_results: int, deadline: Optional[float] = None) -> Tuple[List[Dict], int, bool]:
+		# Quota wait plus the request, or whatever is left of the CV's deadline
+		budget = TAVILY_MAX_QUOTA_WAIT_SECONDS + TAVILY_TIMEOUT_SECONDS
+		left = remaining(deadline)
+		if left is not None:
+			if left <= 0:
+				raise ServiceUnavailable("CV deadline exceeded")
+			budget = min(budget, left)
+		future = asyncio.run_coroutine_threadsafe(
+			self._search(api_url, key, query, max_results, budget), self._get_loop()
+		)
+		try:
+			return future.result(timeout=budget)
+		except BaseException:
+			future.cancel()
+			raise
+
+
+_client = _Client()
+
+
+def search_tavily(query: str, max_results: int = 5, deadline: Optional[float] = None) -> List[Dict[str, str]]:
 	"""Search Tavily (or return placeholder results).
 
 	Behavior:
 	- If environment variable `TAVILY_API_URL` is set, make a GET request
 	  to that URL with query parameters `q` and `limit` and return parsed
-	  JSON results (expected to be a list of dicts).
+	  JSON results (expected to be a list of dicts). Results are cached by
+	  the normalized query; errors are not cached.
 	- Otherwise return an empty list with a debug placeholder entry.
 
 	Args:
 		query: Search query string.
 		max_results: Maximum number of results to return.
+		deadline: Epoch seconds after which no request is made or awaited.
 
 	Returns:
 		A list of result dicts with at least `title` and `link` keys.
@@ -42,27 +334,33 @@ def search_tavily(query: str, max_results: int = 5) -> List[Dict[str, str]]:
 			}
 		]
 
-	params = {"q": query, "limit": str(max_results)}
-	url = api_url + "?" + urllib.parse.urlencode(params)
+	key = f"{max_results}:{normalize_query(query)}"
+	cached = cache.get(key)
+	if cached is not None:
+		_bump("cache_hits")
+		return cached
+	_bump("cache_misses")
 
 	try:
-		with urllib.request.urlopen(url, timeout=10) as resp:
-			body = resp.read()
-			data = json.loads(body)
-			if isinstance(data, list):
-				return data[:max_results]
-			# If the API returns a dict with `results` key
-			if isinstance(data, dict) and "results" in data:
-				return data["results"][:max_results]
-	except Exception:
+		breaker("tavily").check()
+		results, nbytes, coalesced = _client.search(api_url, key, query, max_results, deadline)
+	except Exception as e:
+		if not isinstance(e, ServiceUnavailable):
+			record_call("tavily", ok=False)
+		# httpx errors carry a multi-line hint; the first line is enough
+		detail = f"{type(e).__name__}: {(str(e).splitlines() or [''])[0]}"[:200]
+		print(f"[tavily] search failed: {detail}")
 		# On any error return an empty placeholder to avoid raising in nodes
 		return [
 			{
 				"title": f"error fetching results for: {query}",
 				"snippet": "Request failed or returned unexpected data.",
 				"link": "",
+				"degraded": detail,
 			}
 		]
 
-	return []
-
+	if not coalesced:
+		record_call("tavily", nbytes)
+		cache.put(key, results)
+	return results
@@ -0,0 +1,116 @@
+"""Per-node timing for the CV verification graph.
+
+`traced(name, fn)` wraps a graph node. While it runs, clients of external
+services call `record_call(service, nbytes, ok)` once per request they make, and the
+wrapper files the node's wall time, call count, bytes and any exception in the
+trace of the current run. `run_trace()` opens that trace around one graph
+invocation:
+
+  {"total_ms": 1834, "nodes": {"github": {"ms": 1203.4, "calls": 3, "bytes": 48211}, ...}}
+
+Counters are omitted when a node made no external calls, and a node that
+raised gets an "error" entry. Both are held in context variables, so nodes
+running concurrently in the graph's thread pool keep separate counters.
+
+Inside `profile_nodes()` every node also runs under its own cProfile
+profiler; cProfile only sees the thread it was started in, and the graph
+runs its nodes on worker threads.
+
+`add_node_hook` and `add_call_hook` register callbacks that see every node run
+and every external request, traced or not; app/metrics.py uses them.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import contextvars
+import cProfile
+import functools
+import threading
+import time
+
+_run_trace: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("cv_run_trace", default=None)
+_node_counters: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("cv_node_counters", default=None)
+_run_profiles: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar("cv_run_profiles", default=None)
+# Pages of one node may be fetched from several threads at once
+_counters_lock = threading.Lock()
+
+# fn(node name, seconds, raised) and fn(service, nbytes, ok)
+_node_hooks: List[Callable[[str, float, bool], None]] = []
+_call_hooks: List[Callable[[str, int, bool], None]] = []
+
+
+def add_node_hook(fn: Callable[[str, float, bool], None]) -> None:
+    _node_hooks.append(fn)
+
+
+def add_call_hook(fn: Callable[[str, int, bool], None]) -> None:
+    _call_hooks.append(fn)
+
+
+def record_call(service: str, nbytes: int = 0, ok: bool = True) -> None:
+    """Count one external request (and its response size) for the running node."""
+    for hook in _call_hooks:
+        hook(service, nbytes, ok)
+    counters = _node_counters.get()
+    if counters is None:
+        return
+    with _counters_lock:
+        counters["calls"] += 1
+        counters["bytes"] += nbytes
+
+
+@contextmanager
+def run_trace() -> Iterator[Dict[str, Any]]:
+    """Collect node timings for the graph run inside the `with` block."""
+    trace: Dict[str, Any] = {"total_ms": 0, "nodes": {}}
+    token = _run_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace["total_ms"] = round((time.perf_counter() - start) * 1000)
+        _run_trace.reset(token)
+
+
+@contextmanager
+def profile_nodes() -> Iterator[List[cProfile.Profile]]:
+    """Profile every node run inside the `with` block; yields the profilers."""
+    profiles: List[cProfile.Profile] = []
+    token = _run_profiles.set(profiles)
+    try:
+        yield profiles
+    finally:
+        _run_profiles.reset(token)
+
+
+def traced(name: str, fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(state):
+        counters = {"calls": 0, "bytes": 0}
+        token = _node_counters.set(counters)
+        error = None
+        start = time.perf_counter()
+        try:
+            profiles = _run_profiles.get()
+            if profiles is None:
+                return fn(state)
+            profiler = cProfile.Profile()
+            profiles.append(profiler)
+            return profiler.runcall(fn, state)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            _node_counters.reset(token)
+            elapsed = time.perf_counter() - start
+            for hook in _node_hooks:
+                hook(name, elapsed, error is not None)
+            entry: Dict[str, Any] = {"ms": round(elapsed * 1000, 1)}
+            if counters["calls"]:
+                entry.update(counters)
+            if error:
+                entry["error"] = error
+            trace = _run_trace.get()
+            if trace is not None:
+                trace["nodes"][name] = entry
+
+    return wrapper
@@ -0,0 +1,73 @@
+"""Text extraction for Word documents.
+
+`.docx` files are zipped WordprocessingML. `word/document.xml` is streamed out
+of the archive through an incremental XML parser, so no full DOM is built and
+finished paragraphs are discarded as we go.
+
+Legacy binary `.doc` files (OLE compound documents) have no parser in the
+standard library. `antiword` is used when installed; otherwise readable text
+runs are scraped from the raw bytes, which recovers the body text of most CVs.
+"""
+from typing import List
+import re
+import shutil
+import subprocess
+import zipfile
+import xml.etree.ElementTree as ET
+
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_TEXT = _W + "t"
+_TAB = _W + "tab"
+_BREAKS = (_W + "br", _W + "cr")
+_PARAGRAPH = _W + "p"
+
+# Runs of printable text in a binary .doc: UTF-16LE first, then 8-bit
+_UTF16_RUN = re.compile(rb"(?:[\x20-\x7e\xa0-\xff]\x00|[\t\r\n]\x00){4,}")
+_BYTE_RUN = re.compile(rb"[\x20-\x7e\t\r\n]{8,}")
+ANTIWORD_TIMEOUT = 20
+
+
+def extract_docx_text(path: str) -> str:
+    """Stream the paragraphs of a .docx, one line per paragraph."""
+    lines: List[str] = []
+    parts: List[str] = []
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        for _, elem in ET.iterparse(xml, events=("end",)):
+            tag = elem.tag
+            if tag == _TEXT:
+                parts.append(elem.text or "")
+            elif tag == _TAB:
+                parts.append("\t")
+            elif tag in _BREAKS:
+                parts.append("\n")
+            elif tag == _PARAGRAPH:
+                lines.append("".join(parts))
+                parts = []
+                # drop the finished paragraph's subtree
+                elem.clear()
+    if parts:
+        lines.append("".join(parts))
+    return "\n".join(lines)
+
+
+def extract_doc_text(path: str) -> str:
+    """Best-effort text from a legacy binary .doc."""
+    antiword = shutil.which("antiword")
+    if antiword:
+        try:
+            out = subprocess.run(
+                [antiword, path], capture_output=True, timeout=ANTIWORD_TIMEOUT, check=True
+            )
+            return out.stdout.decode("utf-8", errors="replace")
+        except (subprocess.SubprocessError, OSError):
+            pass
+
+    with open(path, "rb") as f:
+        data = f.read()
+    runs = [m.group(0).decode("utf-16-le", errors="ignore") for m in _UTF16_RUN.finditer(data)]
+    if not runs:
+        runs = [m.group(0).decode("latin-1") for m in _BYTE_RUN.finditer(data)]
+    return "\n".join(r.replace("\r", "\n") for r in runs)
@@ -0,0 +1,80 @@
+"""Shared fixtures: a local HTTP stub for external services and fresh
+circuit breakers for every test."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from nodes import resilience
+
+
+class StubRequest:
+    def __init__(self, method: str, path: str, headers: Dict[str, str]):
+        self.method = method
+        self.path = path
+        self.headers = headers
+
+
+class HTTPStub:
+    """Answers every request with `handler(request) -> (status, headers, body)`.
+
+    A body that is not bytes is sent as JSON. Every request is kept in
+    `requests`, along with the status it got in `statuses`.
+    """
+
+    def __init__(self, handler: Callable[[StubRequest], Tuple[int, Dict[str, str], object]]):
+        self.handler = handler
+        self.requests: List[StubRequest] = []
+        self.statuses: List[int] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                request = StubRequest("GET", self.path, dict(self.headers))
+                status, headers, body = stub.handler(request)
+                with stub._lock:
+                    stub.requests.append(request)
+                    stub.statuses.append(status)
+                if not isinstance(body, bytes):
+                    body = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def http_stub():
+    stubs = []
+
+    def start(handler):
+        stub = HTTPStub(handler)
+        stubs.append(stub)
+        return stub
+
+    yield start
+    for stub in stubs:
+        stub.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    resilience._breakers.clear()
+    yield
+    resilience._breakers.clear()
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from nodes import company_purpose
+from nodes.company_purpose import PurposeCache, cache_stats, purposes_match
+from nodes.resilience import breaker
+
+
+class FakeLLM:
+    """Answers every item of a batch prompt; matches when the keyword is in the description."""
+
+    def __init__(self, tokens_per_item: int = 100):
+        self.tokens_per_item = tokens_per_item
+        self.batches = []
+
+    def generate_content(self, prompt):
+        items = [json.loads(line) for line in prompt.splitlines() if line.startswith('{"index"')]
+        self.batches.append([item["description"] for item in items])
+        answers = [
+            {"index": item["index"], "match": item["expected_keywords"] in item["description"], "score": 1.0, "reason": "fake"}
+            for item in items
+        ]
+        return SimpleNamespace(
+            text=json.dumps(answers),
+            usage_metadata=SimpleNamespace(total_token_count=self.tokens_per_item * len(items)),
+        )
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(company_purpose, "cache", PurposeCache())
+
+
+def test_pairs_are_batched_up_to_batch_size(monkeypatch):
+    monkeypatch.setattr(company_purpose, "BATCH_SIZE", 3)
+    llm = FakeLLM()
+    pairs = [(f"company {i} builds payments", "payments") for i in range(7)]
+
+    verdicts = purposes_match(pairs, llm=llm)
+
+    assert [len(b) for b in llm.batches] == [3, 3, 1]
+    assert [match for match, _ in verdicts] == [True] * 7
+    assert all(details["reason"] == "fake" for _, details in verdicts)
+
+
+def test_duplicate_pairs_are_evaluated_once():
+    llm = FakeLLM()
+
+    verdicts = purposes_match([
+        ("Acme builds payments", "payments"),
+        ("  acme BUILDS payments ", "Payments"),
+        ("Acme sells shoes", "payments"),
+    ], llm=llm)
+
+    assert llm.batches == [["Acme builds payments", "Acme sells shoes"]]
+    assert verdicts[0] == verdicts[1]
+    assert verdicts[2][0] is False
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path, monkeypatch):
+    path = str(tmp_path / "purpose.sqlite")
+    llm = FakeLLM(tokens_per_item=120)
+    monkeypatch.setattr(company_purpose, "cache", PurposeCache(path))
+    first = purposes_match([("Acme builds payments", "payments")], llm=llm)
+
+    # Another worker process opens the same file
+    monkeypatch.setattr(company_purpose, "cache", PurposeCache(path))
+    before = cache_stats()
+    second = purposes_match([("Acme builds payments", "payments")], llm=llm)
+    after = cache_stats()
+
+    assert len(llm.batches) == 1
+    assert second == first
+    assert after["cache_hits"] - before["cache_hits"] == 1
+    assert after["tokens_saved"] - before["tokens_saved"] == 120
+    assert after["llm_calls"] == before["llm_calls"]
+
+
+def test_a_locked_cache_file_does_not_fail_the_verdict(tmp_path, monkeypatch):
+    path = str(tmp_path / "purpose.sqlite")
+    cache = PurposeCache(path)
+    cache._db.execute("PRAGMA busy_timeout = 50")
+    monkeypatch.setattr(company_purpose, "cache", cache)
+    lock = sqlite3.connect(path)
+    lock.execute("BEGIN EXCLUSIVE")
+    llm = FakeLLM()
+    try:
+        verdicts = purposes_match([("Acme builds payments", "payments")], llm=llm)
+    finally:
+        lock.rollback()
+        lock.close()
+
+    assert verdicts[0][0] is True
+    # Kept in memory even though the file write failed
+    purposes_match([("Acme builds payments", "payments")], llm=llm)
+    assert len(llm.batches) == 1
+
+
+def test_an_open_breaker_degrades_to_the_heuristic():
+    gemini = breaker("gemini")
+    for _ in range(gemini.failure_threshold):
+        gemini.record_failure()
+    llm = FakeLLM()
+
+    [(match, details)] = purposes_match([("Acme builds payments", "payments")], llm=llm)
+
+    assert llm.batches == []
+    assert match is True
+    assert details["reason"] == "heuristic fallback"
+    assert details["degraded"] == "gemini circuit open"
+
+
+def test_a_spent_deadline_degrades_without_calling_gemini():
+    llm = FakeLLM()
+
+    [(match, details)] = purposes_match(
+        [("Acme builds payments", "payments")], llm=llm, deadline=time.time() - 1
+    )
+
+    assert llm.batches == []
+    assert details["degraded"] == "CV deadline exceeded"
+    assert breaker("gemini").state == "closed"
@@ -0,0 +1,123 @@
+"""Pins the download behaviour that CVFileResponse builds on Starlette
+internals (`_handle_simple`, `_should_use_range`); a Starlette upgrade that
+changes them must fail here rather than silently in production."""
+import asyncio
+import hashlib
+import os
+
+import mongomock
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import app.db as db_module
+from app import downloads
+from app.downloads import CVFileResponse, cv_file_response
+
+BODY = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def cv(tmp_path, monkeypatch):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(BODY)
+    sha256 = hashlib.sha256(BODY).hexdigest()
+    mdb = mongomock.MongoClient().db
+    monkeypatch.setattr(db_module, "db", mdb)
+    _id = mdb.requests.insert_one({
+        "cv_path": str(path), "cv_sha256": sha256, "candidate": {"last_name": "Doe"},
+    }).inserted_id
+    downloads.invalidate_cv_file()
+
+    app = FastAPI()
+
+    @app.get("/cv/{c_id}")
+    async def download(c_id: str, request: Request):
+        return await cv_file_response(request, c_id)
+
+    yield TestClient(app), f"/cv/{_id}", f'"{sha256}"'
+    downloads.invalidate_cv_file()
+
+
+def test_full_download_carries_validators(cv):
+    client, url, etag = cv
+
+    resp = client.get(url)
+
+    assert resp.status_code == 200
+    assert resp.content == BODY
+    assert resp.headers["etag"] == etag
+    assert resp.headers["content-type"] == "application/pdf"
+    assert "CV_Doe.pdf" in resp.headers["content-disposition"]
+    assert resp.headers["last-modified"]
+
+
+def test_revalidation_gets_a_304(cv):
+    client, url, etag = cv
+    last_modified = client.get(url).headers["last-modified"]
+
+    by_etag = client.get(url, headers={"If-None-Match": f"W/{etag}"})
+    by_date = client.get(url, headers={"If-Modified-Since": last_modified})
+    changed = client.get(url, headers={"If-None-Match": '"other"'})
+
+    assert by_etag.status_code == 304 and by_etag.content == b""
+    assert by_etag.headers["etag"] == etag
+    assert by_date.status_code == 304
+    assert changed.status_code == 200
+
+
+def test_byte_ranges(cv):
+    client, url, etag = cv
+
+    resp = client.get(url, headers={"Range": "bytes=100-199"})
+
+    assert resp.status_code == 206
+    assert resp.content == BODY[100:200]
+    assert resp.headers["content-range"] == f"bytes 100-199/{len(BODY)}"
+
+
+def test_if_range_accepts_the_sha256_etag(cv):
+    client, url, etag = cv
+
+    matching = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+
+    assert matching.status_code == 206
+    assert matching.content == BODY[:10]
+    # A changed validator means the whole file
+    assert stale.status_code == 200
+    assert stale.content == BODY
+
+
+def _call(response, extensions):
+    scope = {"type": "http", "method": "GET", "headers": [], "extensions": extensions}
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(response(scope, receive, send))
+    return sent
+
+
+def test_pathsend_hands_the_file_to_the_server(tmp_path):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(BODY)
+
+    sent = _call(CVFileResponse(path=str(path), stat_result=os.stat(path)), {"http.response.pathsend": {}})
+
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.pathsend"]
+    assert sent[1]["path"] == str(path)
+
+
+def test_without_pathsend_the_body_is_streamed(tmp_path):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(BODY)
+
+    sent = _call(CVFileResponse(path=str(path), stat_result=os.stat(path)), {})
+
+    assert sent[0]["type"] == "http.response.start"
+    assert b"".join(m.get("body", b"") for m in sent[1:]) == BODY
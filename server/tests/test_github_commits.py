@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from nodes import github_commits
+from nodes.graph_builder import github_node
+
+REPO = "acme/app"
+COMMITS = [
+    {"sha": f"{i:040x}", "commit": {"author": {"name": "dev", "date": f"2021-05-{i + 1:02d}T12:00:00Z"}, "message": f"change {i}"}}
+    for i in range(3)
+]
+
+
+@pytest.fixture(autouse=True)
+def fake_github(monkeypatch):
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setattr(github_commits, "_etag_cache", type(github_commits._etag_cache)())
+
+    def point_at(stub):
+        monkeypatch.setattr(github_commits, "GITHUB_API_URL", stub.url)
+        return stub
+
+    return point_at
+
+
+def _state():
+    return {"parsed_cv": {
+        "roles": [{"title": "Engineer", "company": "Acme", "start": "2020-01-01", "end": None}],
+        "github_repos": [REPO],
+    }}
+
+
+def test_second_run_is_revalidated_with_a_304(http_stub, fake_github):
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, None
+        return 200, {"ETag": '"v1"', "Content-Type": "application/json"}, COMMITS
+
+    stub = fake_github(http_stub(handler))
+
+    first = github_node(_state())["github_commits"][REPO]
+    second = github_node(_state())["github_commits"][REPO]
+
+    assert stub.statuses == [200, 304]
+    # The same URL both times: "until now" must not end up in the query
+    assert stub.requests[0].path == stub.requests[1].path
+    assert "until" not in stub.requests[0].path
+    assert first["commit_count"] == second["commit_count"] == 3
+    assert second["by_role"] == [{"role": 0, "commit_count": 3, "score": 0.3}]
+
+
+def test_waits_for_the_rate_limit_reset(http_stub, fake_github):
+    def handler(request):
+        if not stub.requests:
+            return 403, {"Retry-After": "0.3", "X-RateLimit-Remaining": "0"}, {"message": "rate limited"}
+        return 200, {}, COMMITS
+
+    stub = fake_github(http_stub(handler))
+
+    started = time.monotonic()
+    result = github_commits.get_commits_between(REPO, "2020-01-01T00:00:00Z")
+
+    assert time.monotonic() - started >= 0.3
+    assert stub.statuses == [403, 200]
+    assert result["commit_count"] == 3
+    assert "degraded" not in result
+
+
+def test_gives_up_when_the_reset_is_too_far_away(http_stub, fake_github, monkeypatch):
+    monkeypatch.setattr(github_commits, "MAX_RATE_LIMIT_WAIT", 0.1)
+    stub = fake_github(http_stub(lambda request: (429, {"Retry-After": "30"}, {"message": "slow down"})))
+
+    started = time.monotonic()
+    result = github_commits.get_commits_between(REPO, "2020-01-01T00:00:00Z")
+
+    assert time.monotonic() - started < 5
+    assert stub.statuses == [429]
+    assert result["commit_count"] == 0
+    # Rate limited means GitHub could not be asked, not that the repo is empty
+    assert "degraded" in result
+
+
+def test_a_bare_403_is_an_answer_not_an_outage(http_stub, fake_github):
+    fake_github(http_stub(lambda request: (403, {}, {"message": "Repository access blocked"})))
+
+    result = github_commits.get_commits_between(REPO, "2020-01-01T00:00:00Z")
+
+    assert result["error"] == "Failed to fetch commits"
+    assert "degraded" not in result
+
+
+def test_a_rate_limited_403_is_an_outage(http_stub, fake_github, monkeypatch):
+    monkeypatch.setattr(github_commits, "MAX_RATE_LIMIT_WAIT", 0.1)
+    fake_github(http_stub(lambda request: (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 3600)}, {})))
+
+    result = github_commits.get_commits_between(REPO, "2020-01-01T00:00:00Z")
+
+    assert "degraded" in result
+
+
+def test_the_etag_cache_keeps_only_the_commit_fields_used(http_stub, fake_github):
+    bulky = [{**c, "files": [{"patch": "x" * 10_000}], "parents": [{"sha": "0" * 40}]} for c in COMMITS]
+    fake_github(http_stub(lambda request: (200, {"ETag": '"v1"'}, bulky)))
+
+    github_commits.get_commits_between(REPO, "2020-01-01T00:00:00Z")
+
+    [(etag, page, last)] = github_commits._etag_cache.values()
+    assert etag == '"v1"'
+    assert page == [github_commits._to_commit(c) for c in COMMITS]
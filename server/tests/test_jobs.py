@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from app import jobs
+from app.jobs import (
+    DONE,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    claim_job,
+    complete_job,
+    fail_job,
+    new_job,
+    requeue_stale_jobs,
+)
+from app.worker import handle_job
+
+
+@pytest.fixture
+def col():
+    return mongomock.MongoClient(tz_aware=True).db.requests
+
+
+@pytest.fixture(autouse=True)
+def queue_settings(monkeypatch):
+    monkeypatch.setattr(jobs, "CV_JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(jobs, "CV_JOB_RETRY_BACKOFF_SECONDS", 30)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _job(col, **job):
+    return col.insert_one({"cv_path": "cv.pdf", "job": {**new_job(), **job}}).inserted_id
+
+
+def test_a_job_is_claimed_by_one_worker_only(col):
+    _id = _job(col)
+
+    first = claim_job(col, "a")
+    second = claim_job(col, "b")
+
+    assert first["_id"] == _id
+    assert first["job"]["state"] == RUNNING
+    assert first["job"]["worker"] == "a"
+    assert first["job"]["attempts"] == 1
+    assert second is None
+
+
+def test_claims_the_oldest_due_job_first(col):
+    now = _now()
+    _job(col, available_at=now + timedelta(minutes=5))
+    newer = _job(col, available_at=now - timedelta(minutes=1))
+    older = _job(col, available_at=now - timedelta(minutes=2))
+
+    assert claim_job(col, "a")["_id"] == older
+    assert claim_job(col, "a")["_id"] == newer
+    # The third one is backing off
+    assert claim_job(col, "a") is None
+
+
+def test_failures_back_off_exponentially_then_fail(col):
+    _job(col)
+
+    delays = []
+    for _ in range(2):
+        doc = claim_job(col, "a")
+        before = _now()
+        assert fail_job(col, doc, "boom") == QUEUED
+        job = col.find_one()["job"]
+        delays.append((job["available_at"] - before).total_seconds())
+        # Make the retry due now
+        col.update_one({}, {"$set": {"job.available_at": _now()}})
+
+    assert delays[0] == pytest.approx(30, abs=1)
+    assert delays[1] == pytest.approx(60, abs=1)
+
+    doc = claim_job(col, "a")
+    assert fail_job(col, doc, "boom") == FAILED
+    stored = col.find_one()
+    assert stored["job"]["state"] == FAILED
+    assert stored["job"]["error"] == "boom"
+    assert stored["graph_results"] == {"error": "boom"}
+
+
+def test_stale_running_jobs_are_requeued(col):
+    old = _now() - timedelta(hours=1)
+    stale = _job(col, state=RUNNING, claimed_at=old, worker="dead", attempts=1)
+    exhausted = _job(col, state=RUNNING, claimed_at=old, worker="dead", attempts=3)
+    fresh = _job(col, state=RUNNING, claimed_at=_now(), worker="alive", attempts=1)
+
+    assert requeue_stale_jobs(col, stale_seconds=600) == 1
+
+    assert col.find_one({"_id": stale})["job"]["state"] == QUEUED
+    assert col.find_one({"_id": stale})["job"]["worker"] is None
+    assert col.find_one({"_id": exhausted})["job"]["state"] == FAILED
+    assert col.find_one({"_id": fresh})["job"]["state"] == RUNNING
+
+
+def test_a_requeued_job_ignores_its_previous_worker(col):
+    _job(col)
+    lost = claim_job(col, "a")
+    col.update_one({}, {"$set": {"job.claimed_at": _now() - timedelta(hours=1)}})
+    requeue_stale_jobs(col, stale_seconds=600)
+    current = claim_job(col, "b")
+
+    # Worker a finally reports back; neither outcome may touch b's run
+    complete_job(col, lost, {"risk": {"decision": "Accept"}})
+    fail_job(col, lost, "late failure")
+
+    job = col.find_one()["job"]
+    assert job["state"] == RUNNING
+    assert job["worker"] == "b"
+    assert "graph_results" not in col.find_one()
+
+    complete_job(col, current, {"risk": {"decision": "Accept"}})
+    assert col.find_one()["job"]["state"] == DONE
+
+
+def test_a_failing_graph_run_is_retried(col):
+    _job(col)
+    doc = claim_job(col, "a")
+
+    def run(path):
+        raise RuntimeError("graph exploded")
+
+    assert handle_job(col, doc, run) == QUEUED
+    assert col.find_one()["job"]["error"] == "graph exploded"
+
+
+def test_an_error_while_recording_fails_the_job_instead_of_the_worker(col, monkeypatch):
+    _job(col)
+    doc = claim_job(col, "a")
+
+    def broken_summarize(state):
+        raise ValueError("cannot summarize")
+
+    monkeypatch.setattr(jobs, "summarize", broken_summarize)
+
+    assert handle_job(col, doc, lambda path: {"risk": {}}) == QUEUED
+    job = col.find_one()["job"]
+    assert job["state"] == QUEUED
+    assert job["error"] == "ValueError: cannot summarize"
+
+
+def _graph_state(decision):
+    return {
+        "parsed_cv": {"roles": [{"title": "Engineer", "description": "Engineer at Acme"}]},
+        "risk": {"risk_score": 0.2, "decision": decision, "total_commits": 0},
+    }
+
+
+def test_each_run_keeps_its_own_evidence(col):
+    db = col.database
+    for decision in ("Accept", "Reject"):
+        _id = col.insert_one({"cv_path": "cv.pdf", "cv_sha256": "abc", "job": new_job()}).inserted_id
+        doc = claim_job(col, "a")
+        assert jobs.process_job(col, doc, lambda path, d=decision: _graph_state(d), evidence_col=db.cv_evidence) == DONE
+
+    first, second = col.find().sort("_id", 1)
+    assert first["graph_results"]["evidence"] != second["graph_results"]["evidence"]
+    # The second run of the same file did not touch the first run's evidence
+    assert db.cv_evidence.count_documents({}) == 2
+    assert db.cv_evidence.find_one({"_id": first["graph_results"]["evidence"]})["evidence"]["role_lines"] == ["Engineer at Acme"]
+
+
+def test_a_superseded_worker_writes_no_evidence_or_cache_entry(col):
+    db = col.database
+    _job(col)
+    col.update_one({}, {"$set": {"cv_sha256": "abc"}})
+    lost = claim_job(col, "a")
+    col.update_one({}, {"$set": {"job.claimed_at": _now() - timedelta(hours=1)}})
+    requeue_stale_jobs(col, stale_seconds=600)
+    claim_job(col, "b")
+
+    state = jobs.process_job(col, lost, lambda path: _graph_state("Accept"), db.cv_results, db.cv_evidence)
+
+    assert state == RUNNING
+    assert db.cv_evidence.count_documents({}) == 0
+    assert db.cv_results.count_documents({}) == 0
+    assert "graph_results" not in col.find_one()
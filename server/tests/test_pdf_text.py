@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import shutil
+
+import pytest
+
+from nodes import pdf_text
+from nodes.pdf_text import ExtractionFailed, extract_pdf_text
+
+SAMPLE_PDF = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "server", "data", "cv_files", "353037d71a4b4e7e933562a81fae03a7.pdf",
+)
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "PDF_TEXT_CACHE_DIR", str(tmp_path / "text_cache"))
+    path = tmp_path / "cv.pdf"
+    shutil.copy(SAMPLE_PDF, path)
+    yield str(path)
+    pool = pdf_text._pool
+    if pool is not None:
+        pdf_text._reset_pool(pool)
+
+
+def test_text_is_extracted_once_and_then_read_from_the_cache(pdf, monkeypatch):
+    text = extract_pdf_text(pdf)
+    assert text.strip()
+
+    def no_pool(path):
+        raise AssertionError("extracted twice")
+
+    monkeypatch.setattr(pdf_text, "_extract_in_pool", no_pool)
+    assert extract_pdf_text(pdf) == text
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs a FIFO to block the worker")
+def test_a_stuck_extraction_fails_and_its_worker_is_killed(pdf, tmp_path, monkeypatch):
+    # Opening a FIFO with no writer blocks the worker for good; only a kill frees it
+    stuck = str(tmp_path / "stuck.pdf")
+    os.mkfifo(stuck)
+    before = {p.pid for p in multiprocessing.active_children()}
+    monkeypatch.setattr(pdf_text, "PDF_EXTRACT_TIMEOUT", 2)
+
+    with pytest.raises(ExtractionFailed, match="exceeded"):
+        pdf_text._extract_in_pool(stuck)
+
+    workers = [p for p in multiprocessing.active_children() if p.pid not in before]
+    for proc in workers:
+        proc.join(timeout=5)
+    alive = [p.pid for p in workers if p.is_alive()]
+    if alive:
+        # Unblock the worker so a failure does not hang the test run
+        os.close(os.open(stuck, os.O_WRONLY | os.O_NONBLOCK))
+    assert not alive
+
+    # A fresh pool serves the next document
+    monkeypatch.setattr(pdf_text, "PDF_EXTRACT_TIMEOUT", 60)
+    assert extract_pdf_text(pdf).strip()
@@ -0,0 +1,64 @@
+"""Startup budget: the API must import fast and never wait for MongoDB."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Measured at 0.5-0.7 s; the margin absorbs slow CI machines
+IMPORT_BUDGET_SECONDS = 2.0
+# Only the workers run the graph; the API must not pay for these at startup
+HEAVY_MODULES = ("nodes.graph_builder", "langgraph", "pdfplumber", "google.genai")
+# A non-routable address: connecting would hang until a timeout
+UNREACHABLE_MONGO = "mongodb://10.255.255.1:27017/?serverSelectionTimeoutMS=30000"
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": sorted(sys.modules)}))
+"""
+
+
+def _slowest_imports(importtime_log: str, n: int = 10) -> str:
+    rows = []
+    for line in importtime_log.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    rows.sort(reverse=True)
+    return "\n".join(f"{us / 1000:8.1f} ms  {name}" for us, name in rows[:n])
+
+
+def test_app_import_stays_within_budget():
+    env = {**os.environ, "MONGO_URI": UNREACHABLE_MONGO, "PYTHONPATH": SERVER_DIR}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    loaded = [m for m in HEAVY_MODULES if m in probe["modules"]]
+    assert not loaded, f"app.main imports {loaded}"
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS, (
+        f"import app.main took {probe['seconds']:.2f}s; slowest imports:\n{_slowest_imports(proc.stderr)}"
+    )
+
+
+def test_startup_does_not_wait_for_mongo(monkeypatch):
+    from app import db, main
+
+    monkeypatch.setattr(db, "MONGO_URI", UNREACHABLE_MONGO)
+    monkeypatch.setattr(main, "READINESS_TIMEOUT_SECONDS", 0.5)
+    monkeypatch.setattr(db, "_client", None)
+
+    started = time.perf_counter()
+    with TestClient(main.app) as client:
+        assert time.perf_counter() - started < 1.0
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 503
@@ -0,0 +1,119 @@
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from nodes import tavily_search
+from nodes.tavily_search import MinuteQuota, SearchCache, search_stats, search_tavily
+
+
+def _results(request):
+    q = parse_qs(urlparse(request.path).query)["q"][0]
+    return [{"title": f"About {q}", "link": "https://example.com/a", "snippet": "..."}]
+
+
+@pytest.fixture
+def tavily(http_stub, monkeypatch):
+    """Point search_tavily at a stub, with an empty cache and a fresh client."""
+    monkeypatch.setattr(tavily_search, "cache", SearchCache())
+
+    def start(handler, per_minute=0):
+        stub = http_stub(handler)
+        monkeypatch.setenv("TAVILY_API_URL", f"{stub.url}/search")
+        client = tavily_search._Client()
+        client._quota = MinuteQuota(per_minute)
+        monkeypatch.setattr(tavily_search, "_client", client)
+        return stub
+
+    return start
+
+
+def test_repeated_queries_are_served_from_the_cache(tavily):
+    stub = tavily(lambda request: (200, {}, _results(request)))
+
+    first = search_tavily("Jane Doe  Engineer")
+    second = search_tavily("  jane doe engineer")
+
+    assert len(stub.requests) == 1
+    assert first == second
+    assert first[0]["title"] == "About Jane Doe  Engineer"
+
+
+def test_errors_are_not_cached(tavily):
+    stub = tavily(lambda request: (503, {}, {"error": "busy"}) if not stub.requests else (200, {}, _results(request)))
+
+    failed = search_tavily("Jane Doe Engineer")
+    ok = search_tavily("Jane Doe Engineer")
+
+    assert stub.statuses == [503, 200]
+    assert failed[0]["degraded"].startswith("HTTPStatusError")
+    assert ok[0]["link"]
+
+
+def test_the_cache_persists_in_sqlite(tavily, tmp_path, monkeypatch):
+    path = str(tmp_path / "tavily.sqlite")
+    monkeypatch.setattr(tavily_search, "cache", SearchCache(path))
+    stub = tavily(lambda request: (200, {}, _results(request)))
+    search_tavily("Jane Doe Engineer")
+
+    # A new process (or another worker) opens the same file
+    monkeypatch.setattr(tavily_search, "cache", SearchCache(path))
+    search_tavily("Jane Doe Engineer")
+    assert len(stub.requests) == 1
+
+    monkeypatch.setattr(tavily_search, "cache", SearchCache(path, ttl=-1))
+    search_tavily("Jane Doe Engineer")
+    assert len(stub.requests) == 2
+
+
+def test_concurrent_identical_queries_share_one_request(tavily):
+    def slow(request):
+        time.sleep(0.3)
+        return 200, {}, _results(request)
+
+    stub = tavily(slow)
+    coalesced = search_stats()["coalesced"]
+    barrier = threading.Barrier(5)
+    answers = []
+
+    def search():
+        barrier.wait()
+        answers.append(search_tavily("Jane Doe Engineer"))
+
+    threads = [threading.Thread(target=search) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(stub.requests) == 1
+    assert search_stats()["coalesced"] - coalesced == 4
+    assert all(a == answers[0] for a in answers)
+
+
+def test_quota_caps_requests_per_minute(tavily):
+    stub = tavily(lambda request: (200, {}, _results(request)), per_minute=2)
+
+    search_tavily("first candidate")
+    search_tavily("second candidate")
+    started = time.monotonic()
+    third = search_tavily("third candidate")
+
+    # The window frees up in a minute, longer than a search may wait: give up now
+    assert time.monotonic() - started < 0.5
+    assert len(stub.requests) == 2
+    assert third[0]["degraded"].startswith("QuotaExceeded")
+
+
+def test_a_429_holds_requests_back_for_retry_after(tavily):
+    stub = tavily(lambda request: (429, {"Retry-After": "1"}, {}) if not stub.requests else (200, {}, _results(request)))
+
+    throttled = search_tavily("first candidate")
+    started = time.monotonic()
+    ok = search_tavily("second candidate")
+
+    assert throttled[0]["degraded"].startswith("HTTPStatusError")
+    assert time.monotonic() - started >= 0.9
+    assert stub.statuses == [429, 200]
+    assert ok[0]["link"]
@@ -0,0 +1,95 @@
+import os
+import stat
+import zipfile
+
+import pytest
+
+from nodes import word_text
+from nodes.graph_builder import run_cv_graph
+from nodes.resume_parser import extract_text
+from nodes.word_text import OLE_MAGIC, extract_doc_text, extract_docx_text
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _docx(path, paragraphs):
+    """Minimal .docx: each paragraph is a list of runs; "\\t" and "\\n" become w:tab and w:br."""
+    body = []
+    for runs in paragraphs:
+        xml_runs = []
+        for run in runs:
+            if run == "\t":
+                xml_runs.append("<w:r><w:tab/></w:r>")
+            elif run == "\n":
+                xml_runs.append("<w:r><w:br/></w:r>")
+            else:
+                xml_runs.append(f"<w:r><w:t>{run}</w:t></w:r>")
+        body.append(f"<w:p>{''.join(xml_runs)}</w:p>")
+    document = f'<?xml version="1.0"?><w:document xmlns:w="{W}"><w:body>{"".join(body)}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", "<Types/>")
+        zf.writestr("word/document.xml", document)
+    return str(path)
+
+
+def test_docx_paragraphs_become_lines(tmp_path):
+    path = _docx(tmp_path / "cv.docx", [
+        ["Jane ", "Doe"],
+        ["2019-01 - 2021-06", "\t", "Engineer at Acme"],
+        ["Berlin, DE", "\n", "https://github.com/jane/app"],
+    ])
+
+    assert extract_docx_text(path) == (
+        "Jane Doe\n"
+        "2019-01 - 2021-06\tEngineer at Acme\n"
+        "Berlin, DE\nhttps://github.com/jane/app"
+    )
+
+
+def test_the_extractor_is_chosen_by_content_not_extension(tmp_path):
+    path = _docx(tmp_path / "cv.pdf", [["Jane Doe"]])
+
+    assert extract_text(path) == "Jane Doe"
+
+
+def _doc(path, body: bytes):
+    path.write_bytes(OLE_MAGIC + b"\x00" * 504 + body + b"\x00" * 64)
+    return str(path)
+
+
+def test_doc_without_antiword_scans_utf16_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(word_text.shutil, "which", lambda name: None)
+    path = _doc(tmp_path / "cv.doc", "Jane Doe\rEngineer at Acme".encode("utf-16-le"))
+
+    assert extract_doc_text(path) == "Jane Doe\nEngineer at Acme"
+
+
+def test_doc_without_antiword_falls_back_to_8_bit_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(word_text.shutil, "which", lambda name: None)
+    path = _doc(tmp_path / "cv.doc", b"Jane Doe, Engineer at Acme")
+
+    assert extract_doc_text(path) == "Jane Doe, Engineer at Acme"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses a shell script as antiword")
+@pytest.mark.parametrize("exit_code, expected", [(0, "from antiword\n"), (1, "Jane Doe, Engineer at Acme")])
+def test_doc_uses_antiword_and_falls_back_when_it_fails(tmp_path, monkeypatch, exit_code, expected):
+    antiword = tmp_path / "antiword"
+    antiword.write_text(f"#!/bin/sh\necho from antiword\nexit {exit_code}\n")
+    antiword.chmod(antiword.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(word_text.shutil, "which", lambda name: str(antiword))
+    path = _doc(tmp_path / "cv.doc", b"Jane Doe, Engineer at Acme")
+
+    assert extract_doc_text(path) == expected
+
+
+def test_a_cv_without_text_ends_in_manual_review(tmp_path):
+    path = _docx(tmp_path / "empty.docx", [[], [" "]])
+
+    result = run_cv_graph(path)
+
+    assert result["risk"]["decision"] == "Manual Review"
+    assert result["risk"]["risk_score"] is None
+    # The parser ends the graph; no check node ran
+    assert list(result["timings"]["nodes"]) == ["resume_parser"]
+    assert "github_commits" not in result